@@ -0,0 +1,221 @@
+import bisect
+import math
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from models import db, Case, CaseRollup, AcceptWaitRollup, QueueDepth, DoctorWorkload, DoctorProfile, User
+import triage_queue
+
+# Admin analytics, maintained incrementally instead of computed from `cases`.
+# Every case transition (opened, accepted, rejected, closed, specialist
+# assigned) calls record() in the same transaction, which bumps:
+# - CaseRollup: transition counts per hour and per day bucket, queue and region
+# - AcceptWaitRollup: a fixed-bin histogram of queue-to-accept times (medians)
+# - QueueDepth / DoctorWorkload: live gauges of open cases and doctor load
+# summary() only reads these tables, so its cost depends on the window and the
+# number of queues/regions/doctors, never on how many cases exist.
+
+HOUR, DAY = 'hour', 'day'
+UNKNOWN_REGION = 'unknown'
+REGION_CELL_DEG = 1.0
+LIVE = ('open', 'active')
+EVENTS = ('opened', 'accepted', 'rejected', 'closed')
+
+# Upper bounds (seconds) of the accept-wait histogram bins; the last bin is open-ended.
+# Stored rows refer to bins by index, so only ever append to this list.
+WAIT_BINS = [5, 15, 30, 60, 120, 300, 600, 900, 1800, 2700, 3600, 5400, 7200, 10800, 14400,
+             21600, 28800, 43200, 86400, 172800, 345600, 604800]
+
+# Snapshot of a case that doesn't exist yet
+NEW = (None, frozenset())
+
+
+def region_of(latitude, longitude):
+    """Grid cell ('lat,lon' of its south-west corner) used as the analytics region."""
+    if latitude is None or longitude is None:
+        return UNKNOWN_REGION
+    return f'{math.floor(latitude / REGION_CELL_DEG) * REGION_CELL_DEG:g},' \
+           f'{math.floor(longitude / REGION_CELL_DEG) * REGION_CELL_DEG:g}'
+
+
+def snapshot(case):
+    """The part of a case's state the rollups track. Take it before changing the case."""
+    return case.status, frozenset({case.doctor_profile_id, case.specialist_profile_id} - {None})
+
+
+def snapshot_before_claim(case):
+    """Snapshot of a case just claimed by triage_queue.claim, as it was before:
+    open with no generalist. A specialist assigned earlier is kept by the claim."""
+    return 'open', frozenset({case.specialist_profile_id} - {None})
+
+
+def bucket_starts(at):
+    return [(HOUR, at.replace(minute=0, second=0, microsecond=0)),
+            (DAY, at.replace(hour=0, minute=0, second=0, microsecond=0))]
+
+
+def _increment(model, key, **deltas):
+    """Add `deltas` to the row identified by `key`, creating it if needed."""
+    where = [getattr(model, col) == value for col, value in key.items()]
+    values = {col: getattr(model, col) + delta for col, delta in deltas.items()}
+    update = db.update(model).where(*where).values(**values).execution_options(synchronize_session=False)
+    if db.session.execute(update).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(model).values(**key, **deltas))
+    except IntegrityError:
+        # Another transaction created the row between our UPDATE and INSERT
+        db.session.execute(update)
+
+
+def record(case, before, event=None, at=None):
+    """Apply one transition of `case` (already modified, not yet committed) to
+    the rollups. `before` is snapshot(case) from before the change; `event` is
+    one of EVENTS or None for changes that only move gauges. Caller commits."""
+    at = at or datetime.utcnow()
+    spec = triage_queue.queue_name(case.required_specialist)
+    region = case.region or UNKNOWN_REGION
+    status_before, doctors_before = before
+    status_after, doctors_after = snapshot(case)
+
+    if status_after == 'open' and status_before != 'open':
+        case.queued_at = at
+    depth = (status_after == 'open') - (status_before == 'open')
+    if depth:
+        _increment(QueueDepth, {'specialization': spec, 'region': region}, open_cases=depth)
+
+    live_before = doctors_before if status_before in LIVE else frozenset()
+    live_after = doctors_after if status_after in LIVE else frozenset()
+    for doc_id in live_after - live_before:
+        _increment(DoctorWorkload, {'doctor_profile_id': doc_id}, active_cases=1)
+    for doc_id in live_before - live_after:
+        _increment(DoctorWorkload, {'doctor_profile_id': doc_id}, active_cases=-1)
+
+    if not event:
+        return
+    deltas = {event: 1}
+    if event == 'accepted':
+        waited_since = case.queued_at or case.created_at or at
+        wait = max((at - waited_since).total_seconds(), 0.0)
+        deltas['accept_wait_total'] = wait
+        wait_bin = bisect.bisect_left(WAIT_BINS, wait)
+    for granularity, bucket_start in bucket_starts(at):
+        key = {'granularity': granularity, 'bucket_start': bucket_start, 'specialization': spec}
+        _increment(CaseRollup, dict(key, region=region), **deltas)
+        if event == 'accepted':
+            _increment(AcceptWaitRollup, dict(key, bin=wait_bin), count=1)
+
+
+def histogram_median(counts):
+    """Median wait (seconds) from per-bin counts, interpolated linearly inside its bin."""
+    total = sum(counts)
+    if not total:
+        return None
+    half, seen = total / 2, 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= half:
+            lower = WAIT_BINS[i - 1] if i else 0
+            if i == len(WAIT_BINS):
+                return lower  # Open-ended bin: "more than a week"
+            return lower + (WAIT_BINS[i] - lower) * (half - seen) / count
+        seen += count
+    return None
+
+
+def summary(hours=None, days=None, top_doctors=10):
+    """Dashboard numbers over the last `hours` (hourly buckets) or `days` (daily buckets)."""
+    if hours:
+        granularity, now = HOUR, datetime.utcnow()
+        start = bucket_starts(now)[0][1] - timedelta(hours=hours - 1)
+    else:
+        days = days or 7
+        granularity, now = DAY, datetime.utcnow()
+        start = bucket_starts(now)[1][1] - timedelta(days=days - 1)
+    in_window = [CaseRollup.granularity == granularity, CaseRollup.bucket_start >= start]
+
+    volume = {}
+    for spec, opened, accepted, rejected, closed, wait_total in db.session.execute(
+        db.select(CaseRollup.specialization, db.func.sum(CaseRollup.opened), db.func.sum(CaseRollup.accepted),
+                  db.func.sum(CaseRollup.rejected), db.func.sum(CaseRollup.closed),
+                  db.func.sum(CaseRollup.accept_wait_total))
+          .where(*in_window).group_by(CaseRollup.specialization)
+    ):
+        volume[spec] = {'opened': opened, 'accepted': accepted, 'rejected': rejected, 'closed': closed,
+                        'mean_accept_wait_s': round(wait_total / accepted, 1) if accepted else None}
+
+    histograms = {}
+    for spec, wait_bin, count in db.session.execute(
+        db.select(AcceptWaitRollup.specialization, AcceptWaitRollup.bin, db.func.sum(AcceptWaitRollup.count))
+          .where(AcceptWaitRollup.granularity == granularity, AcceptWaitRollup.bucket_start >= start)
+          .group_by(AcceptWaitRollup.specialization, AcceptWaitRollup.bin)
+    ):
+        histograms.setdefault(spec, [0] * (len(WAIT_BINS) + 1))[wait_bin] += count
+    overall = [sum(column) for column in zip(*histograms.values())] if histograms else []
+    median_accept_wait = {spec: round(histogram_median(counts), 1) for spec, counts in histograms.items()}
+
+    series = [{'bucket_start': bucket_start.isoformat(), 'opened': opened, 'accepted': accepted, 'closed': closed}
+              for bucket_start, opened, accepted, closed in db.session.execute(
+                  db.select(CaseRollup.bucket_start, db.func.sum(CaseRollup.opened),
+                            db.func.sum(CaseRollup.accepted), db.func.sum(CaseRollup.closed))
+                    .where(*in_window).group_by(CaseRollup.bucket_start).order_by(CaseRollup.bucket_start))]
+
+    queue_depth = {}
+    for region, spec, open_cases in db.session.execute(
+        db.select(QueueDepth.region, QueueDepth.specialization, QueueDepth.open_cases).where(QueueDepth.open_cases > 0)
+    ):
+        queue_depth.setdefault(region, {})[spec] = open_cases
+
+    approved = db.session.execute(
+        db.select(db.func.count()).select_from(DoctorProfile).where(DoctorProfile.is_approved == True)
+    ).scalar()
+    busy, held, most = db.session.execute(
+        db.select(db.func.count(), db.func.sum(DoctorWorkload.active_cases), db.func.max(DoctorWorkload.active_cases))
+          .where(DoctorWorkload.active_cases > 0)
+    ).one()
+    busiest = db.session.execute(
+        db.select(User.username, DoctorProfile.specialization, DoctorWorkload.active_cases)
+          .join(DoctorProfile, DoctorProfile.id == DoctorWorkload.doctor_profile_id)
+          .join(User, User.id == DoctorProfile.user_id)
+          .where(DoctorWorkload.active_cases > 0)
+          .order_by(DoctorWorkload.active_cases.desc()).limit(top_doctors)
+    ).all()
+
+    return {
+        'window': {'granularity': granularity, 'start': start.isoformat()},
+        'volume': volume,
+        'median_accept_wait_s': median_accept_wait,
+        'overall_median_accept_wait_s': round(histogram_median(overall), 1) if overall else None,
+        'series': series,
+        'queue_depth': queue_depth,
+        'doctor_utilization': {
+            'approved_doctors': approved,
+            'busy_doctors': busy,
+            'utilization': round(busy / approved, 3) if approved else None,
+            'mean_active_cases': round((held or 0) / approved, 2) if approved else None,
+            'max_active_cases': most or 0,
+            'busiest': [{'username': u, 'specialization': s, 'active_cases': n} for u, s, n in busiest],
+        },
+    }
+
+
+def rebuild_gauges():
+    """Recompute QueueDepth and DoctorWorkload from `cases` (e.g. after manual
+    edits to the table). One grouped pass each; the counters are history and
+    are left as they are. Caller commits."""
+    db.session.execute(db.delete(QueueDepth))
+    db.session.execute(db.delete(DoctorWorkload))
+    depths = {}
+    for required, region, n in db.session.execute(
+        db.select(Case.required_specialist, Case.region, db.func.count())
+          .where(Case.status == 'open').group_by(Case.required_specialist, Case.region)
+    ):
+        key = (triage_queue.queue_name(required), region or UNKNOWN_REGION)
+        depths[key] = depths.get(key, 0) + n
+    if depths:
+        db.session.execute(db.insert(QueueDepth), [
+            {'specialization': spec, 'region': region, 'open_cases': n} for (spec, region), n in depths.items()])
+    workloads = DoctorProfile.active_case_counts(
+        db.session.execute(db.select(DoctorProfile.id)).scalars())
+    rows = [{'doctor_profile_id': doc_id, 'active_cases': n} for doc_id, n in workloads.items() if n]
+    if rows:
+        db.session.execute(db.insert(DoctorWorkload), rows)
@@ -89,6 +89,8 @@ class AssignSpecialistForm(FlaskForm):
 
 class PrescriptionForm(FlaskForm):
     medicine_details = TextAreaField('Prescription / Instructions', validators=[DataRequired()])
+    dosage = StringField('Dosage', validators=[Optional(), Length(max=100)])
+    override_safety = BooleanField('Prescribe despite the safety warnings')
     submit = SubmitField('Add Prescription')
 
 class ScheduleMeetingForm(FlaskForm):
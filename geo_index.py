@@ -0,0 +1,139 @@
+import math
+import time
+
+EARTH_RADIUS_KM = 6371
+
+
+class DoctorGeoIndex:
+    """In-memory grid index of approved doctors, bucketed per specialization.
+
+    Each doctor is placed in a lat/lon grid cell. A query walks rings of cells
+    outwards from the patient and stops as soon as no unvisited cell can beat
+    the current top-k, so only the neighbourhood of the patient is scanned.
+    """
+
+    def __init__(self, cell_deg=0.5, max_age=60):
+        self.cell_deg = cell_deg
+        self.max_age = max_age  # Rebuild at least this often to pick up edits from other workers
+        self._built_at = None
+        self._grids = {}        # specialization -> {(row, col): [(doc_id, lat, lon), ...]}
+        self._unlocated = {}    # specialization -> [doc_id, ...] (no coordinates)
+        self._max_abs_lat = 0.0
+
+    def invalidate(self):
+        self._built_at = None
+
+    def ensure_fresh(self, load_rows):
+        """Rebuild from `load_rows()` if the index was invalidated or is stale."""
+        if self._built_at is None or time.monotonic() - self._built_at > self.max_age:
+            self.build(load_rows())
+
+    def build(self, rows):
+        """rows: iterable of (doc_id, specialization, latitude, longitude)."""
+        grids, unlocated, max_abs_lat = {}, {}, 0.0
+        for doc_id, spec, lat, lon in sorted(rows, key=lambda r: r[0]):
+            if lat is None or lon is None:
+                unlocated.setdefault(spec, []).append(doc_id)
+                continue
+            grids.setdefault(spec, {}).setdefault(self._cell(lat, lon), []).append((doc_id, lat, lon))
+            max_abs_lat = max(max_abs_lat, abs(lat))
+        self._grids, self._unlocated, self._max_abs_lat = grids, unlocated, max_abs_lat
+        self._built_at = time.monotonic()
+
+    def specializations_matching(self, category):
+        # Same semantics as DoctorProfile.specialization.ilike('%category%')
+        needle = (category or '').lower()
+        return [s for s in set(self._grids) | set(self._unlocated) if s and needle in s.lower()]
+
+    def nearest(self, lat, lon, category=None, k=5, radius_km=None):
+        """Return up to k (doc_id, distance_km) pairs, nearest first (ties by doc_id).
+
+        Falls back to all specializations if none match `category`.
+        """
+        specs = self.specializations_matching(category) if category else []
+        if not specs:
+            specs = list(set(self._grids) | set(self._unlocated))
+
+        results = []
+        if lat is not None and lon is not None:
+            results = self._ring_search(lat, lon, specs, k, radius_km)
+
+        # Doctors without coordinates (or a patient without coordinates) rank
+        # at infinite distance, exactly like haversine() returning inf.
+        if len(results) < k and radius_km is None:
+            seen = {r[0] for r in results}
+            rest = sorted(d for s in specs for d in self._unlocated.get(s, []))
+            if lat is None or lon is None:
+                rest = sorted(rest + [e[0] for s in specs for cell in self._grids.get(s, {}).values() for e in cell])
+            rest = [d for d in rest if d not in seen][:k - len(results)]
+            results += [(d, float('inf')) for d in rest]
+        return results
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def _ring_search(self, lat, lon, specs, k, radius_km):
+        grids = [self._grids[s] for s in specs if s in self._grids]
+        total = sum(len(cell) for g in grids for cell in g.values())
+        row0, col0 = self._cell(lat, lon)
+        ncols = math.ceil(360 / self.cell_deg)
+        cos_max = math.cos(math.radians(min(89.9, max(self._max_abs_lat, abs(lat)))))
+
+        found, visited, ring, seen = [], 0, 0, set()
+        while visited < total:
+            batch = []
+            for cell in self._ring_cells(row0, col0, ring, ncols):
+                if cell in seen:  # Rings overlap once they wrap around the antimeridian
+                    continue
+                seen.add(cell)
+                for g in grids:
+                    for doc_id, dlat, dlon in g.get(cell, ()):
+                        visited += 1
+                        dist = haversine(lat, lon, dlat, dlon)
+                        if radius_km is None or dist <= radius_km:
+                            batch.append((doc_id, dist))
+            if batch:
+                found += batch
+                found.sort(key=lambda r: (r[1], r[0]))
+                del found[k:]
+
+            # Anything not yet visited is at least `ring` whole cells away.
+            bound = self._min_distance(ring, cos_max)
+            if radius_km is not None and bound > radius_km:
+                break
+            if len(found) >= k and found[-1][1] <= bound:
+                break
+            ring += 1
+            if ring > max(180 / self.cell_deg, ncols):
+                break
+        return found
+
+    def _ring_cells(self, row0, col0, r, ncols):
+        if r == 0:
+            yield (row0, col0 % ncols)
+            return
+        for dc in range(-r, r + 1):
+            yield (row0 - r, (col0 + dc) % ncols)
+            yield (row0 + r, (col0 + dc) % ncols)
+        for dr in range(-r + 1, r):
+            yield (row0 + dr, (col0 - r) % ncols)
+            yield (row0 + dr, (col0 + r) % ncols)
+
+    def _min_distance(self, ring, cos_max):
+        gap = math.radians(ring * self.cell_deg)
+        by_lat = EARTH_RADIUS_KM * gap
+        by_lon = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, cos_max * math.sin(min(gap, math.pi) / 2)))
+        return min(by_lat, by_lon)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Calculate the great circle distance between two points on the earth in km."""
+    if None in [lat1, lon1, lat2, lon2]: return float('inf')
+    R = EARTH_RADIUS_KM
+    dLat = math.radians(lat2 - lat1)
+    dLon = math.radians(lon2 - lon1)
+    a = math.sin(dLat / 2) * math.sin(dLat / 2) + \
+        math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
+        math.sin(dLon / 2) * math.sin(dLon / 2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return R * c
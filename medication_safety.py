@@ -0,0 +1,323 @@
+import re
+from datetime import datetime, timedelta
+from models import db, Case, PatientProfile, Prescription
+from cache import TTLCache
+
+# Allergy and interaction checks for free-text prescriptions, using the local
+# drug tables below (no network lookups, so it works offline in the clinic).
+#
+# For each patient a PatientSafetyIndex is compiled once from the allergies in
+# PatientProfile.medical_history and the patient's current prescriptions on
+# any case: allergens are sets of drugs/classes, and every current medicine is
+# expanded into a dict of "agent this would clash with -> findings". Checking
+# a new prescription is then a tokenise plus a few dict/set lookups, with no
+# database access while the patient's index is cached (see MedicationSafety).
+#
+# The tables cover common drugs and well-known interactions only; a clear
+# check is not a substitute for the prescriber's own review.
+
+# class -> member drugs (canonical lower-case names)
+DRUG_CLASSES = {
+    'penicillin': ['penicillin', 'amoxicillin', 'ampicillin', 'cloxacillin', 'dicloxacillin', 'flucloxacillin',
+                   'piperacillin', 'benzylpenicillin', 'phenoxymethylpenicillin', 'co-amoxiclav'],
+    'cephalosporin': ['cefalexin', 'cefadroxil', 'cefuroxime', 'cefixime', 'cefpodoxime', 'ceftriaxone',
+                      'cefotaxime', 'ceftazidime', 'cefazolin'],
+    'carbapenem': ['meropenem', 'imipenem', 'ertapenem'],
+    'sulfonamide': ['sulfamethoxazole', 'co-trimoxazole', 'sulfadiazine', 'sulfasalazine'],
+    'macrolide': ['azithromycin', 'clarithromycin', 'erythromycin'],
+    'fluoroquinolone': ['ciprofloxacin', 'levofloxacin', 'ofloxacin', 'moxifloxacin', 'norfloxacin'],
+    'tetracycline': ['doxycycline', 'tetracycline', 'minocycline'],
+    'aminoglycoside': ['gentamicin', 'amikacin', 'streptomycin'],
+    'nsaid': ['ibuprofen', 'diclofenac', 'aceclofenac', 'naproxen', 'aspirin', 'ketorolac', 'indomethacin',
+              'mefenamic acid', 'piroxicam', 'meloxicam', 'celecoxib', 'etoricoxib'],
+    'opioid': ['morphine', 'codeine', 'tramadol', 'tapentadol', 'oxycodone', 'hydrocodone', 'fentanyl'],
+    'benzodiazepine': ['diazepam', 'alprazolam', 'lorazepam', 'clonazepam', 'midazolam'],
+    'anticoagulant': ['warfarin', 'acenocoumarol', 'apixaban', 'rivaroxaban', 'dabigatran', 'heparin'],
+    'antiplatelet': ['clopidogrel', 'prasugrel', 'ticagrelor'],
+    'ssri': ['fluoxetine', 'sertraline', 'paroxetine', 'citalopram', 'escitalopram', 'fluvoxamine'],
+    'maoi': ['phenelzine', 'tranylcypromine', 'isocarboxazid', 'selegiline'],
+    'nitrate': ['nitroglycerin', 'isosorbide'],
+    'pde5_inhibitor': ['sildenafil', 'tadalafil', 'vardenafil'],
+    'ace_inhibitor': ['enalapril', 'lisinopril', 'ramipril', 'captopril', 'perindopril'],
+    'arb': ['losartan', 'telmisartan', 'valsartan', 'olmesartan'],
+    'potassium_sparing_diuretic': ['spironolactone', 'eplerenone', 'amiloride'],
+    'statin': ['atorvastatin', 'simvastatin', 'rosuvastatin', 'pravastatin', 'lovastatin'],
+}
+
+# Other names a drug is written as (spellings, brands common here) -> canonical name
+DRUG_ALIASES = {
+    'cephalexin': 'cefalexin', 'amoxycillin': 'amoxicillin', 'augmentin': 'co-amoxiclav',
+    'amoxiclav': 'co-amoxiclav', 'cotrimoxazole': 'co-trimoxazole', 'bactrim': 'co-trimoxazole',
+    'septran': 'co-trimoxazole', 'brufen': 'ibuprofen', 'combiflam': 'ibuprofen', 'voveran': 'diclofenac',
+    'ecosprin': 'aspirin', 'disprin': 'aspirin', 'glyceryl trinitrate': 'nitroglycerin', 'gtn': 'nitroglycerin',
+    'viagra': 'sildenafil', 'meftal': 'mefenamic acid',
+}
+
+# Drugs that don't belong to a class above but take part in interactions
+OTHER_DRUGS = ['methotrexate', 'trimethoprim', 'allopurinol', 'azathioprine', 'digoxin']
+
+# Combination products: the product also counts as each of its components
+COMPONENTS = {
+    'co-trimoxazole': ['sulfamethoxazole', 'trimethoprim'],
+    'co-amoxiclav': ['amoxicillin'],
+}
+
+# How allergies to a class are written in a history ("allergic to sulfa drugs")
+CLASS_ALIASES = {
+    'penicillin': 'penicillin', 'penicillins': 'penicillin', 'cephalosporins': 'cephalosporin',
+    'sulfa': 'sulfonamide', 'sulpha': 'sulfonamide', 'sulfonamides': 'sulfonamide',
+    'macrolides': 'macrolide', 'quinolones': 'fluoroquinolone', 'fluoroquinolones': 'fluoroquinolone',
+    'tetracyclines': 'tetracycline', 'nsaid': 'nsaid', 'nsaids': 'nsaid', 'opioids': 'opioid',
+    'opiates': 'opioid', 'statins': 'statin', 'ace inhibitors': 'ace_inhibitor',
+}
+
+# Allergy to the first class -> risk of reacting to these related classes
+CROSS_REACTIVITY = {
+    'penicillin': ['cephalosporin', 'carbapenem'],
+}
+
+# (agent, agent, severity, effect); an agent is a drug or a class. 'major' blocks
+# the prescription unless the doctor overrides it, 'moderate' only warns.
+INTERACTIONS = [
+    ('anticoagulant', 'nsaid', 'major', 'bleeding risk'),
+    ('anticoagulant', 'antiplatelet', 'major', 'bleeding risk'),
+    ('warfarin', 'sulfonamide', 'major', 'raises INR, bleeding risk'),
+    ('warfarin', 'macrolide', 'moderate', 'may raise INR'),
+    ('warfarin', 'fluoroquinolone', 'moderate', 'may raise INR'),
+    ('ssri', 'maoi', 'major', 'serotonin syndrome'),
+    ('tramadol', 'maoi', 'major', 'serotonin syndrome'),
+    ('tramadol', 'ssri', 'moderate', 'serotonin syndrome, lowers seizure threshold'),
+    ('nitrate', 'pde5_inhibitor', 'major', 'severe hypotension'),
+    ('opioid', 'benzodiazepine', 'major', 'respiratory depression'),
+    ('methotrexate', 'trimethoprim', 'major', 'methotrexate toxicity'),
+    ('methotrexate', 'nsaid', 'moderate', 'methotrexate toxicity'),
+    ('allopurinol', 'azathioprine', 'major', 'azathioprine toxicity (bone marrow suppression)'),
+    ('ace_inhibitor', 'potassium_sparing_diuretic', 'moderate', 'hyperkalaemia'),
+    ('arb', 'potassium_sparing_diuretic', 'moderate', 'hyperkalaemia'),
+    ('ace_inhibitor', 'arb', 'moderate', 'dual RAAS blockade: hyperkalaemia, kidney injury'),
+    ('statin', 'macrolide', 'moderate', 'myopathy'),
+    ('digoxin', 'macrolide', 'moderate', 'digoxin toxicity'),
+]
+
+BLOCKING = ('allergy', 'major')
+# Prescriptions on closed cases still count as current for this long
+RECENT_DAYS = 90
+
+TOKEN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+ALLERGY_CLAUSE = re.compile(r'[^.;\n]*(?:allerg|hypersensitiv|intoleran|reaction to)[^.;\n]*')
+# Parts of a clause that can change polarity: "allergic to sulfa, not to penicillin"
+CLAUSE_PART = re.compile(r',|\b(?:but|however|except|although|though|whereas)\b')
+# Anything after one of these in a clause part is negated ("no allergy to penicillin")
+NEGATION = re.compile(r'\b(?:no|not|nil|none|never|denies|denied|deny|without|negative|nkda|nka)\b')
+
+
+def _compile():
+    """Lookup tables: term -> canonical drug, drug -> its agents, agent -> [(other agent, severity, effect)]."""
+    classes_of = {}
+    for cls, members in DRUG_CLASSES.items():
+        for drug in members:
+            classes_of.setdefault(drug, set()).add(cls)
+    drugs = set(classes_of) | set(OTHER_DRUGS)
+    terms = {drug: drug for drug in drugs}
+    terms.update(DRUG_ALIASES)
+    agents = {}
+    for drug in drugs:
+        parts = [drug] + COMPONENTS.get(drug, [])
+        agents[drug] = frozenset(parts) | frozenset(c for part in parts for c in classes_of.get(part, ()))
+    partners = {}
+    for a, b, severity, effect in INTERACTIONS:
+        partners.setdefault(a, []).append((b, severity, effect))
+        partners.setdefault(b, []).append((a, severity, effect))
+    return terms, agents, partners
+
+
+TERMS, AGENTS, PARTNERS = _compile()
+MAX_TERM_WORDS = max(len(term.split()) for term in list(TERMS) + list(CLASS_ALIASES))
+
+
+def _phrases(text):
+    """Every run of 1..MAX_TERM_WORDS consecutive words of `text`, lower-cased."""
+    words = TOKEN.findall((text or '').lower())
+    for n in range(1, MAX_TERM_WORDS + 1):
+        for i in range(len(words) - n + 1):
+            yield ' '.join(words[i:i + n])
+
+
+def find_drugs(text):
+    """Canonical names of the known drugs mentioned in free text, in order of first mention."""
+    found = {}
+    for phrase in _phrases(text):
+        drug = TERMS.get(phrase)
+        if drug:
+            found.setdefault(drug, None)
+    return list(found)
+
+
+def find_allergies(medical_history):
+    """(drugs, classes) the history records an allergy to. Only clauses that
+    mention an allergy/reaction are read, so "on aspirin" isn't an allergy, and
+    only up to a negation, so "no allergy to penicillin" isn't either. A
+    negation after the drug ("allergic to penicillin, no anaphylaxis") doesn't
+    cancel it: when in doubt the allergy is kept."""
+    drugs, classes = set(), set()
+    for clause in ALLERGY_CLAUSE.findall((medical_history or '').lower()):
+        for part in CLAUSE_PART.split(clause):
+            negated = NEGATION.search(part)
+            for phrase in _phrases(part[:negated.start()] if negated else part):
+                if phrase in CLASS_ALIASES:
+                    classes.add(CLASS_ALIASES[phrase])
+                elif phrase in TERMS:
+                    drugs.add(TERMS[phrase])
+    return drugs, classes
+
+
+def _finding(kind, severity, drug, message, other=(None, None)):
+    """`other` is the (prescription_id, drug) the new drug clashes with, if any."""
+    return {'kind': kind, 'severity': severity, 'blocking': severity in BLOCKING, 'drug': drug,
+            'message': message, 'prescription_id': other[0], 'other_drug': other[1]}
+
+
+class PatientSafetyIndex:
+    """A patient's allergies and current medicines, compiled for fast checks."""
+
+    def __init__(self, patient_id, medical_history, prescriptions):
+        """prescriptions: [(prescription_id, medicine text)] currently taken."""
+        self.patient_id = patient_id
+        allergic_drugs, allergic_classes = find_allergies(medical_history)
+        # Allergy to one drug is treated as allergy to its whole class
+        self.allergens = {}  # agent -> what the history says the patient is allergic to
+        for drug in allergic_drugs:
+            for agent in AGENTS[drug]:
+                if agent != drug and agent in DRUG_CLASSES:
+                    self.allergens.setdefault(agent, f'{drug} ({agent.replace("_", " ")})')
+            self.allergens[drug] = drug
+        for cls in allergic_classes:
+            self.allergens[cls] = cls.replace('_', ' ')
+        self.cross_reactive = {}  # related class -> allergen class
+        for cls in list(self.allergens):
+            for related in CROSS_REACTIVITY.get(cls, ()):
+                if related not in self.allergens:
+                    self.cross_reactive.setdefault(related, cls)
+
+        self.medicines = []  # [(prescription_id, drug)]
+        self.clashes = {}    # agent of a new drug -> [(severity, effect, (prescription_id, current drug))]
+        self.classes = {}    # class -> [(prescription_id, current drug)], for duplicate therapy
+        for prescription_id, text in prescriptions:
+            for drug in find_drugs(text):
+                self._add_current((prescription_id, drug))
+
+    def _add_current(self, entry):
+        self.medicines.append(entry)
+        for agent in AGENTS[entry[1]]:
+            for other, severity, effect in PARTNERS.get(agent, ()):
+                self.clashes.setdefault(other, []).append((severity, effect, entry))
+            if agent in DRUG_CLASSES:
+                self.classes.setdefault(agent, []).append(entry)
+
+    def check_drug(self, drug, exclude=None):
+        """Findings for prescribing `drug`. `exclude` is a (prescription_id, drug)
+        entry to ignore: the drug itself when re-checking current medicines."""
+        findings = []
+        agents = AGENTS[drug]
+        allergic = [self.allergens[a] for a in agents if a in self.allergens]
+        if allergic:
+            findings.append(_finding('allergy', 'allergy', drug, f'{drug}: patient is allergic to {allergic[0]}'))
+        else:
+            related = next((self.cross_reactive[a] for a in agents if a in self.cross_reactive), None)
+            if related:
+                findings.append(_finding('cross_reactivity', 'moderate', drug,
+                                         f'{drug}: possible cross-reactivity with {related} allergy'))
+        worst = {}  # current entry -> its most severe (severity, effect) with this drug
+        for agent in agents:
+            for severity, effect, entry in self.clashes.get(agent, ()):
+                if entry != exclude and (entry not in worst or severity == 'major'):
+                    worst[entry] = (severity, effect)
+        for entry, (severity, effect) in worst.items():
+            findings.append(_finding('interaction', severity, drug, f'{drug} + {entry[1]}: {effect}', entry))
+        seen = {exclude, *worst}
+        for agent in agents:
+            for entry in self.classes.get(agent, ()):
+                if entry not in seen:
+                    seen.add(entry)
+                    findings.append(_finding('duplicate', 'moderate', drug,
+                                             f'{drug}: patient already takes {entry[1]} ({agent.replace("_", " ")})',
+                                             entry))
+        return findings
+
+    def check(self, text):
+        """Findings for a new free-text prescription, including clashes between
+        the drugs it names itself."""
+        drugs = find_drugs(text)
+        findings = [f for drug in drugs for f in self.check_drug(drug)]
+        for i, drug in enumerate(drugs):
+            for other in drugs[i + 1:]:
+                clashes = sorted((severity != 'major', effect) for agent in AGENTS[drug]
+                                 for partner, severity, effect in PARTNERS.get(agent, ()) if partner in AGENTS[other])
+                shared = sorted(AGENTS[drug] & AGENTS[other] & DRUG_CLASSES.keys())
+                if clashes:
+                    severity = 'moderate' if clashes[0][0] else 'major'
+                    findings.append(_finding('interaction', severity, drug, f'{drug} + {other}: {clashes[0][1]}',
+                                             (None, other)))
+                elif shared:
+                    findings.append(_finding('duplicate', 'moderate', drug,
+                                             f'{drug} and {other} are both {shared[0].replace("_", " ")}s',
+                                             (None, other)))
+        return findings
+
+    def recheck(self):
+        """Findings for every current prescription against the allergies and
+        against each other; a clashing pair is reported once."""
+        findings, reported = [], set()
+        for entry in self.medicines:
+            for f in self.check_drug(entry[1], exclude=entry):
+                if f['other_drug']:
+                    pair = (f['kind'], frozenset([entry, (f['prescription_id'], f['other_drug'])]))
+                    if pair in reported:
+                        continue
+                    reported.add(pair)
+                findings.append(dict(f, for_prescription_id=entry[0]))
+        return findings
+
+
+class MedicationSafety:
+    """Per-patient PatientSafetyIndex cache.
+
+    A cached index answers without touching the database. The routes that change
+    an input (history edits, new prescriptions, closed cases) invalidate it in
+    their own worker; changes made through another worker are picked up when the
+    short TTL expires, and saving a prescription always checks a fresh index.
+    """
+
+    def __init__(self, ttl=30, max_entries=5000):
+        self._cache = TTLCache(ttl=ttl, max_entries=max_entries)
+
+    def invalidate(self, patient_id):
+        self._cache.pop(patient_id)
+
+    def index_for(self, patient_id, fresh=False):
+        index = None if fresh else self._cache.get(patient_id)
+        if index is None:
+            index = self.build(patient_id)
+            self._cache.set(patient_id, index)
+        return index
+
+    @staticmethod
+    def build(patient_id):
+        medical_history = db.session.execute(
+            db.select(PatientProfile.medical_history).where(PatientProfile.id == patient_id)
+        ).scalar()
+        cutoff = datetime.utcnow() - timedelta(days=RECENT_DAYS)
+        rows = db.session.execute(
+            db.select(Prescription.id, Prescription.medicine)
+              .join(Case, Case.id == Prescription.case_id)
+              .where(Case.patient_profile_id == patient_id,
+                     Case.status.in_(['open', 'active']) | (Prescription.created_at >= cutoff))
+              .order_by(Prescription.id)
+        ).all()
+        return PatientSafetyIndex(patient_id, medical_history, rows)
+
+    def check(self, patient_id, text, fresh=False):
+        return self.index_for(patient_id, fresh).check(text)
+
+    def recheck(self, patient_id):
+        return self.index_for(patient_id).recheck()
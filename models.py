@@ -2,6 +2,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+import re
 import uuid
 
 db = SQLAlchemy()
@@ -44,6 +45,10 @@ class PatientProfile(db.Model):
 
 class DoctorProfile(db.Model):
     __tablename__ = "doctor_profiles"
+    __table_args__ = (
+        # Approved doctors by specialization (admin queue, recommend_doctor, specialist search)
+        db.Index('ix_doctor_profiles_approved_specialization', 'is_approved', 'specialization'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'))
     specialization = db.Column(db.String(100))
@@ -61,14 +66,39 @@ class DoctorProfile(db.Model):
     @property
     def active_cases_count(self):
         # Count cases where this doctor is either generalist or specialist and case is 'active' or 'open'
-        count = Case.query.filter(
-            (Case.doctor_profile_id == self.id) | (Case.specialist_profile_id == self.id),
-            Case.status.in_(['open', 'active'])
-        ).count()
-        return count
+        return DoctorProfile.active_case_counts([self.id])[self.id]
+
+    @staticmethod
+    def active_case_counts(doc_ids):
+        """Open/active case counts for many doctors in one grouped query: {doc_id: count}."""
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return {}
+        live = Case.status.in_(['open', 'active'])
+        # UNION (not UNION ALL) so a doctor holding both roles on a case counts it once
+        roles = db.union(
+            db.select(Case.id.label('case_id'), Case.doctor_profile_id.label('doc_id'))
+              .where(live, Case.doctor_profile_id.in_(doc_ids)),
+            db.select(Case.id.label('case_id'), Case.specialist_profile_id.label('doc_id'))
+              .where(live, Case.specialist_profile_id.in_(doc_ids)),
+        ).subquery()
+        rows = db.session.execute(
+            db.select(roles.c.doc_id, db.func.count()).group_by(roles.c.doc_id)
+        ).all()
+        counts = dict.fromkeys(doc_ids, 0)
+        counts.update({doc_id: n for doc_id, n in rows})
+        return counts
 
 class Case(db.Model):
     __tablename__ = "cases"
+    __table_args__ = (
+        # Triage queue: open cases for a specialization, oldest first
+        db.Index('ix_cases_status_specialist_created', 'status', 'required_specialist', 'created_at'),
+        # Keyset-paginated dashboard listings (queries.case_page)
+        db.Index('ix_cases_generalist_created', 'doctor_profile_id', 'created_at', 'id'),
+        db.Index('ix_cases_specialist_created', 'specialist_profile_id', 'created_at', 'id'),
+        db.Index('ix_cases_patient_created', 'patient_profile_id', 'created_at', 'id'),
+    )
     id = db.Column(db.String(36), primary_key=True, default=gen_uuid)
     patient_profile_id = db.Column(db.Integer, db.ForeignKey('patient_profiles.id'))
     
@@ -91,19 +121,166 @@ class Case(db.Model):
     
     status = db.Column(db.String(20), default='open') # 'open', 'active', 'closed'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    queued_at = db.Column(db.DateTime, nullable=True)   # When the case last entered the open queue (time-to-accept)
+    region = db.Column(db.String(20), nullable=True)    # Patient's grid cell when the case was opened (analytics_rollups.region_of)
     
     # Phase 2: Prescriptions and Scheduling
-    prescriptions = db.Column(db.Text, nullable=True) # Format: Date: Text \with
+    prescriptions = db.Column(db.Text, nullable=True) # Legacy blob, format: \with(date)text -- superseded by Prescription rows
     next_meeting_time = db.Column(db.DateTime, nullable=True)
     next_meeting_notes = db.Column(db.String(255), nullable=True)
     
     reports = db.relationship('Report', backref='case', lazy=True)
+    prescription_items = db.relationship('Prescription', backref='case', lazy=True)
 
 class Report(db.Model):
     __tablename__ = "reports"
     id = db.Column(db.Integer, primary_key=True)
     case_id = db.Column(db.String(36), db.ForeignKey('cases.id'))
-    file_path = db.Column(db.String(255))
+    file_path = db.Column(db.String(255)) # Legacy: file in UPLOAD_FOLDER. With a blob: the original filename
     file_type = db.Column(db.String(50)) # 'PDF', 'Image'
     description = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    blob_sha256 = db.Column(db.String(64), db.ForeignKey('report_blobs.sha256'), nullable=True, index=True)
+    preview_status = db.Column(db.String(10), nullable=True) # 'pending', 'ready', 'failed'; NULL when there is no preview
+
+    blob = db.relationship('ReportBlob')
+
+class ReportBlob(db.Model):
+    """A stored report file, keyed by the SHA-256 of its content and shared by every Report that uploaded it."""
+    __tablename__ = "report_blobs"
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @staticmethod
+    def acquire(sha256):
+        """Take a reference on an existing blob. Returns False if no blob has this hash."""
+        updated = db.session.execute(
+            db.update(ReportBlob).where(ReportBlob.sha256 == sha256)
+              .values(ref_count=ReportBlob.ref_count + 1)
+        ).rowcount
+        return updated == 1
+
+    @staticmethod
+    def release(sha256):
+        """Drop a reference. Returns True if that was the last one and the row is gone,
+        in which case the caller deletes the stored bytes."""
+        db.session.execute(
+            db.update(ReportBlob).where(ReportBlob.sha256 == sha256)
+              .values(ref_count=ReportBlob.ref_count - 1)
+        )
+        deleted = db.session.execute(
+            db.delete(ReportBlob).where(ReportBlob.sha256 == sha256, ReportBlob.ref_count <= 0)
+        ).rowcount
+        return deleted == 1
+
+class CaseRollup(db.Model):
+    """Case transitions counted per hour/day bucket, specialization queue and region."""
+    __tablename__ = "case_rollups"
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'specialization', 'region', name='uq_case_rollups_bucket'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(5), nullable=False) # 'hour', 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    specialization = db.Column(db.String(100), nullable=False)
+    region = db.Column(db.String(20), nullable=False)
+    opened = db.Column(db.Integer, nullable=False, default=0)
+    accepted = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    closed = db.Column(db.Integer, nullable=False, default=0)
+    accept_wait_total = db.Column(db.Float, nullable=False, default=0) # Seconds, summed over `accepted`
+
+class AcceptWaitRollup(db.Model):
+    """Histogram of queue-to-accept times per bucket and specialization (bin = index into WAIT_BINS)."""
+    __tablename__ = "accept_wait_rollups"
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'specialization', 'bin', name='uq_accept_wait_rollups_bucket'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(5), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    specialization = db.Column(db.String(100), nullable=False)
+    bin = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class QueueDepth(db.Model):
+    """Current number of open cases per specialization queue and region."""
+    __tablename__ = "queue_depths"
+    specialization = db.Column(db.String(100), primary_key=True)
+    region = db.Column(db.String(20), primary_key=True)
+    open_cases = db.Column(db.Integer, nullable=False, default=0)
+
+class DoctorWorkload(db.Model):
+    """Current number of open/active cases a doctor holds (as generalist or specialist)."""
+    __tablename__ = "doctor_workloads"
+    doctor_profile_id = db.Column(db.Integer, db.ForeignKey('doctor_profiles.id'), primary_key=True)
+    active_cases = db.Column(db.Integer, nullable=False, default=0)
+
+class Prescription(db.Model):
+    __tablename__ = "prescriptions"
+    id = db.Column(db.Integer, primary_key=True)
+    case_id = db.Column(db.String(36), db.ForeignKey('cases.id'), nullable=False, index=True)
+    author_profile_id = db.Column(db.Integer, db.ForeignKey('doctor_profiles.id'), nullable=True) # NULL for backfilled entries
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    medicine = db.Column(db.Text, nullable=False)
+    dosage = db.Column(db.String(100), nullable=True)
+
+    author = db.relationship('DoctorProfile')
+
+BP_PATTERN = re.compile(r'^\s*(\d{2,3})\s*/\s*(\d{2,3})\s*$')
+
+def parse_bp(bp):
+    """'120/80' -> (120.0, 80.0); None if the free-text value isn't a reading."""
+    match = BP_PATTERN.match(bp or '')
+    if not match:
+        return None
+    return float(match.group(1)), float(match.group(2))
+
+class VitalReading(db.Model):
+    """One measured vital of a patient at a point in time. Case vitals are split
+    into one row per kind (blood pressure into systolic and diastolic)."""
+    __tablename__ = "vital_readings"
+    __table_args__ = (
+        # A patient's series of one vital, in time order (trends and charts)
+        db.Index('ix_vital_readings_patient_kind_time', 'patient_profile_id', 'kind', 'recorded_at'),
+    )
+    KINDS = ('systolic', 'diastolic', 'heart_rate', 'spo2', 'temperature')
+
+    id = db.Column(db.Integer, primary_key=True)
+    patient_profile_id = db.Column(db.Integer, db.ForeignKey('patient_profiles.id'), nullable=False)
+    case_id = db.Column(db.String(36), db.ForeignKey('cases.id'), nullable=True, index=True)
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    kind = db.Column(db.String(20), nullable=False) # One of KINDS
+    value = db.Column(db.Float, nullable=False)
+
+    @staticmethod
+    def from_case(case):
+        """Readings for the vitals entered on a case (which must have an id and patient)."""
+        values = {'heart_rate': case.heart_rate, 'spo2': case.spo2, 'temperature': case.temperature}
+        bp = parse_bp(case.bp)
+        if bp:
+            values['systolic'], values['diastolic'] = bp
+        recorded_at = case.created_at or datetime.utcnow()
+        return [VitalReading(patient_profile_id=case.patient_profile_id, case_id=case.id,
+                             recorded_at=recorded_at, kind=kind, value=float(value))
+                for kind, value in values.items() if value is not None]
+
+class TimelineEvent(db.Model):
+    """One entry of a patient's medical timeline, written together with the change it
+    records so the history is read from this table alone (timeline.py)."""
+    __tablename__ = "timeline_events"
+    __table_args__ = (
+        # A patient's history, newest first (keyset-paginated on occurred_at, id)
+        db.Index('ix_timeline_events_patient_time', 'patient_profile_id', 'occurred_at', 'id'),
+    )
+    KINDS = ('case_opened', 'vitals', 'prescription', 'report', 'specialist_assigned', 'case_closed')
+
+    id = db.Column(db.Integer, primary_key=True)
+    patient_profile_id = db.Column(db.Integer, db.ForeignKey('patient_profiles.id'), nullable=False)
+    case_id = db.Column(db.String(36), db.ForeignKey('cases.id'), nullable=True)
+    occurred_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    kind = db.Column(db.String(20), nullable=False) # One of KINDS
+    ref_id = db.Column(db.Integer, nullable=True)   # Prescription/Report id for those kinds
+    data = db.Column(db.Text, nullable=False)       # Compact JSON with what the entry displays
@@ -0,0 +1,62 @@
+import time
+
+import gevent
+from gevent.threadpool import ThreadPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Werkzeug's password hashes (scrypt by default) take ~100ms of CPU each.
+# Called directly from a request they stall the gevent loop, so every other
+# request and socket waits behind a burst of logins. PasswordHasher runs them
+# on real OS threads instead; hashlib releases the GIL while hashing, so the
+# loop keeps serving (and several hashes can run at once on multi-core hosts).
+
+
+class PasswordHasher:
+    def __init__(self, threads=4):
+        self._pool = ThreadPool(threads)
+
+    def check(self, pwhash, password):
+        if not pwhash:
+            return False
+        return self._pool.apply(check_password_hash, (pwhash, password))
+
+    def hash(self, password):
+        return self._pool.apply(generate_password_hash, (password,))
+
+    def hash_many(self, passwords):
+        return list(self._pool.imap(generate_password_hash, passwords))
+
+
+def benchmark_login_storm(hasher, logins=50, tick=0.01):
+    """Verify `logins` passwords concurrently, inline and on the thread pool.
+
+    A ticker greenlet measures how long the event loop is blocked; max_stall_ms
+    is what any other request would have waited during the storm.
+    """
+    pwhash = generate_password_hash('password')
+
+    def run(check):
+        gaps = []
+        stop = []
+
+        def ticker():
+            last = time.perf_counter()
+            while not stop:
+                gevent.sleep(tick)
+                now = time.perf_counter()
+                gaps.append(now - last - tick)
+                last = now
+
+        ticker_greenlet = gevent.spawn(ticker)
+        gevent.sleep(0)
+        start = time.perf_counter()
+        gevent.joinall([gevent.spawn(check, pwhash, 'password') for _ in range(logins)])
+        elapsed = time.perf_counter() - start
+        stop.append(True)
+        ticker_greenlet.join()
+        return {'total_s': round(elapsed, 3),
+                'logins_per_s': round(logins / elapsed, 1),
+                'max_stall_ms': round(max(gaps, default=0) * 1000, 1),
+                'loop_ticks': len(gaps)}
+
+    return {'logins': logins, 'inline': run(check_password_hash), 'thread_pool': run(hasher.check)}
@@ -0,0 +1,58 @@
+from concurrent.futures import ProcessPoolExecutor
+
+# Small JPEG previews of uploaded reports: a thumbnail for images, the first
+# page for PDFs. Rendering is CPU-bound (decoding a CT image or rasterising a
+# PDF page), so it runs in a process pool instead of the gevent worker.
+# Previews are derived from content, so they are stored next to the report's
+# blob under "<sha256>.preview.jpg" and shared by every report of that blob.
+
+PREVIEW_SIZE = (320, 320)
+PREVIEW_QUALITY = 70
+IMAGE_TYPES = {'PNG', 'JPG', 'JPEG'}
+
+
+def preview_key(sha256):
+    return f'{sha256}.preview.jpg'
+
+
+def can_preview(file_type):
+    return file_type in IMAGE_TYPES or file_type == 'PDF'
+
+
+def render_preview(src_path, file_type, dest_path, size=PREVIEW_SIZE, quality=PREVIEW_QUALITY):
+    """Write a JPEG preview of src_path to dest_path. Runs in a pool process."""
+    from PIL import Image, ImageOps
+
+    if file_type == 'PDF':
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(src_path)
+        try:
+            page = pdf[0]
+            # Render at roughly the preview size rather than full resolution
+            scale = max(size) / max(page.get_size())
+            image = page.render(scale=min(scale * 2, 2)).to_pil()
+        finally:
+            pdf.close()
+    else:
+        image = Image.open(src_path)
+        image.draft('RGB', size)  # Lets the JPEG decoder downscale while decoding
+        image = ImageOps.exif_transpose(image)
+
+    image.thumbnail(size)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(dest_path, 'JPEG', quality=quality, optimize=True)
+
+
+class PreviewRenderer:
+    """Process pool for render_preview, started on first use."""
+
+    def __init__(self, processes=2):
+        self.processes = processes
+        self._pool = None
+
+    def render(self, src_path, file_type, dest_path):
+        """Render in the pool and wait for it (only this greenlet blocks)."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        self._pool.submit(render_preview, src_path, file_type, dest_path).result()
@@ -0,0 +1,76 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, Case, DoctorProfile, Prescription
+
+PAGE_SIZE = 20
+CASE_STATUSES = ('open', 'active', 'closed')
+
+# Which Case column each listing is keyed on
+CASE_SCOPES = {
+    'generalist': Case.doctor_profile_id,
+    'specialist': Case.specialist_profile_id,
+    'patient': Case.patient_profile_id,
+}
+
+
+def case_listing_options():
+    """Eager-load everything the case tables render per row (patient, generalist, specialist)."""
+    return [
+        joinedload(Case.patient_profile),
+        joinedload(Case.generalist).joinedload(DoctorProfile.user),
+        joinedload(Case.specialist).joinedload(DoctorProfile.user),
+    ]
+
+
+def encode_cursor(case):
+    raw = f"{case.created_at.isoformat()}|{case.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for a malformed cursor."""
+    try:
+        created_at, case_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(created_at), case_id
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def case_page(scope, profile_id, cursor=None, status=None, limit=PAGE_SIZE):
+    """One page of a case listing, newest first, keyset-paginated on (created_at, id).
+
+    Returns (cases, next_cursor); next_cursor is None on the last page. Cost is
+    independent of how many older cases the listing has.
+    """
+    q = Case.query.options(*case_listing_options()).filter(CASE_SCOPES[scope] == profile_id)
+    if status:
+        q = q.filter(Case.status == status)
+    if cursor:
+        created_at, case_id = decode_cursor(cursor)
+        q = q.filter(or_(Case.created_at < created_at,
+                         and_(Case.created_at == created_at, Case.id < case_id)))
+    rows = q.order_by(Case.created_at.desc(), Case.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def case_with_details(case_id):
+    """Case page: patient, care team and reports in a fixed number of queries."""
+    return db.session.get(Case, case_id, options=case_listing_options() + [selectinload(Case.reports)])
+
+
+def prescription_page(case_id, before_id=None, limit=PAGE_SIZE):
+    """Newest-first page of a case's prescriptions, keyset-paginated on id.
+
+    Returns (prescriptions, next_cursor) where next_cursor is the before_id for the next page.
+    """
+    q = Prescription.query.options(joinedload(Prescription.author).joinedload(DoctorProfile.user)).filter(
+        Prescription.case_id == case_id
+    )
+    if before_id:
+        q = q.filter(Prescription.id < before_id)
+    rows = q.order_by(Prescription.id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
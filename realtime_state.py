@@ -0,0 +1,194 @@
+import time
+
+# Presence and video-room state for the Socket.IO signaling handlers.
+# MemoryStateStore keeps it in this process (single worker, the default).
+# RedisStateStore shares it between server processes; pair it with
+# SocketIO(message_queue=...) so emits reach sockets held by other workers.
+#
+# A user is online while at least one of their sockets (tabs, devices) has
+# sent a heartbeat within `presence_ttl` seconds.
+
+
+class MemoryStateStore:
+    """Process-local state with reverse indexes so every operation is O(1) in
+    the number of connected sockets and open rooms."""
+
+    def __init__(self, presence_ttl=90):
+        self.presence_ttl = presence_ttl
+        self.user_sessions = {}  # Maps user_id to {socket_id: last_seen}
+        self.socket_users = {}   # Reverse map: socket_id -> user_id
+        self.video_rooms = {}    # Maps room_id to {socket_id: None}, a dict used as an insertion-ordered set
+        self.socket_rooms = {}   # Reverse map: socket_id -> {room_id, ...}
+        self.last_seen = {}      # Maps user_id to the last time any of their sockets was seen
+
+    def add_session(self, user_id, sid):
+        now = time.time()
+        self.user_sessions.setdefault(user_id, {})[sid] = now
+        self.socket_users[sid] = user_id
+        self.last_seen[user_id] = now
+
+    def touch(self, sid):
+        """Record a heartbeat from sid."""
+        user_id = self.socket_users.get(sid)
+        if user_id is not None:
+            now = time.time()
+            self.user_sessions[user_id][sid] = now
+            self.last_seen[user_id] = now
+
+    def remove_socket(self, sid):
+        """Forget a disconnected socket. Returns [user_id] if that was the user's last session."""
+        user_id = self.socket_users.pop(sid, None)
+        if user_id is None:
+            return []
+        sessions = self.user_sessions.get(user_id, {})
+        sessions.pop(sid, None)
+        self.last_seen[user_id] = time.time()
+        if not sessions:
+            self.user_sessions.pop(user_id, None)
+            return [user_id]
+        return []
+
+    def sessions(self, user_id):
+        """Socket ids of the user's live sessions."""
+        cutoff = time.time() - self.presence_ttl
+        return [sid for sid, seen in self.user_sessions.get(user_id, {}).items() if seen >= cutoff]
+
+    def is_online(self, user_id):
+        return bool(self.sessions(user_id))
+
+    def online_status(self, user_ids):
+        """Bulk presence: {user_id: {'online': bool, 'last_seen': epoch seconds or None}}."""
+        return {user_id: {'online': self.is_online(user_id), 'last_seen': self.last_seen.get(user_id)}
+                for user_id in user_ids}
+
+    def join_room(self, room, sid):
+        """Add sid to a video room and return the members in join order."""
+        members = self.video_rooms.setdefault(room, {})
+        members[sid] = None
+        self.socket_rooms.setdefault(sid, set()).add(room)
+        return list(members)
+
+    def leave_rooms(self, sid):
+        """Remove sid from every video room. Returns the room ids it left."""
+        left = self.socket_rooms.pop(sid, set())
+        for room in left:
+            members = self.video_rooms.get(room)
+            if members is not None:
+                members.pop(sid, None)
+                if not members:
+                    del self.video_rooms[room]
+        return list(left)
+
+    def pop_room(self, room):
+        """Delete a video room and return its former members."""
+        members = list(self.video_rooms.pop(room, {}))
+        for sid in members:
+            rooms = self.socket_rooms.get(sid)
+            if rooms is not None:
+                rooms.discard(room)
+                if not rooms:
+                    del self.socket_rooms[sid]
+        return members
+
+
+class RedisStateStore:
+    """Same interface as MemoryStateStore, backed by Redis.
+
+    Room membership is a sorted set scored by join time so the first joiner
+    (the caller) stays first. Requires the `redis` package. `client` is an
+    existing client with decode_responses=True, used instead of `url`.
+    """
+
+    def __init__(self, url=None, prefix='telehealth', presence_ttl=90, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.redis = client
+        self.prefix = prefix
+        self.presence_ttl = presence_ttl
+
+    def _key(self, *parts):
+        return ':'.join(str(part) for part in (self.prefix,) + parts)
+
+    def add_session(self, user_id, sid):
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key('sessions', user_id), sid, now)
+        pipe.hset(self._key('socket_users'), sid, user_id)
+        pipe.hset(self._key('last_seen'), user_id, now)
+        pipe.execute()
+
+    def touch(self, sid):
+        user_id = self.redis.hget(self._key('socket_users'), sid)
+        if user_id:
+            now = time.time()
+            pipe = self.redis.pipeline()
+            pipe.hset(self._key('sessions', user_id), sid, now)
+            pipe.hset(self._key('last_seen'), user_id, now)
+            pipe.execute()
+
+    def remove_socket(self, sid):
+        user_id = self.redis.hget(self._key('socket_users'), sid)
+        if not user_id:
+            return []
+        pipe = self.redis.pipeline()
+        pipe.hdel(self._key('socket_users'), sid)
+        pipe.hdel(self._key('sessions', user_id), sid)
+        pipe.hset(self._key('last_seen'), user_id, time.time())
+        pipe.hlen(self._key('sessions', user_id))
+        remaining = pipe.execute()[-1]
+        return [] if remaining else [int(user_id)]  # Redis hands back strings; user ids are ints
+
+    def sessions(self, user_id):
+        cutoff = time.time() - self.presence_ttl
+        return [sid for sid, seen in self.redis.hgetall(self._key('sessions', user_id)).items() if float(seen) >= cutoff]
+
+    def is_online(self, user_id):
+        return bool(self.sessions(user_id))
+
+    def online_status(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        cutoff = time.time() - self.presence_ttl
+        pipe = self.redis.pipeline()
+        for user_id in user_ids:
+            pipe.hvals(self._key('sessions', user_id))
+        pipe.hmget(self._key('last_seen'), user_ids)
+        replies = pipe.execute()
+        last_seen = replies[-1]
+        return {user_id: {'online': any(float(seen) >= cutoff for seen in replies[i]),
+                          'last_seen': float(last_seen[i]) if last_seen[i] else None}
+                for i, user_id in enumerate(user_ids)}
+
+    def join_room(self, room, sid):
+        pipe = self.redis.pipeline()
+        pipe.zadd(self._key('room', room), {sid: time.time()}, nx=True)
+        pipe.sadd(self._key('socket_rooms', sid), room)
+        pipe.zrange(self._key('room', room), 0, -1)
+        return pipe.execute()[-1]
+
+    def leave_rooms(self, sid):
+        rooms = self.redis.smembers(self._key('socket_rooms', sid))
+        pipe = self.redis.pipeline()
+        for room in rooms:
+            pipe.zrem(self._key('room', room), sid)
+        pipe.delete(self._key('socket_rooms', sid))
+        pipe.execute()
+        return list(rooms)
+
+    def pop_room(self, room):
+        members = self.redis.zrange(self._key('room', room), 0, -1)
+        pipe = self.redis.pipeline()
+        for sid in members:
+            pipe.srem(self._key('socket_rooms', sid), room)
+        pipe.delete(self._key('room', room))
+        pipe.execute()
+        return members
+
+
+def create_state_store(url=None):
+    """RedisStateStore for a redis:// URL, otherwise process-local MemoryStateStore."""
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStateStore(url)
+    return MemoryStateStore()
@@ -0,0 +1,88 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from cache import TTLCache
+
+
+def normalize(text):
+    return ' '.join(str(text or '').lower().split())
+
+
+class RecommendationCache:
+    """TTL + LRU cache in front of a slow recommendation call.
+
+    - Identical (normalized) symptoms+vitals are answered from memory.
+    - Concurrent identical requests share one in-flight call (single-flight).
+    - Every caller waits at most `timeout` seconds, then gets `fallback`. A
+      call that finishes late still fills the cache for the next request.
+
+    `fetch(symptoms, vitals)` returns the answer, or None on failure (failures
+    are never cached).
+    """
+
+    def __init__(self, fetch, ttl=3600, max_entries=1024, timeout=8.0, fallback=None, workers=8):
+        self.fetch = fetch
+        self.timeout = timeout
+        self.fallback = fallback
+        self._entries = TTLCache(ttl=ttl, max_entries=max_entries)  # Only touched under _lock
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'timeouts': 0, 'errors': 0,
+                       'calls': 0, 'call_ms_total': 0.0, 'call_ms_max': 0.0}
+
+    def get(self, symptoms, vitals):
+        key = (normalize(symptoms), normalize(vitals))
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._stats['hits'] += 1
+                return value
+            future = self._inflight.get(key)
+            if future:
+                self._stats['coalesced'] += 1
+            else:
+                self._stats['misses'] += 1
+                future = self._pool.submit(self._call, key, symptoms, vitals)
+                self._inflight[key] = future
+
+        try:
+            value = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            return self.fallback
+        return self.fallback if value is None else value
+
+    def _call(self, key, symptoms, vitals):
+        started = time.monotonic()
+        value = None
+        try:
+            value = self.fetch(symptoms, vitals)
+        except Exception as e:
+            print(f"Recommendation call failed: {e}")
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._stats['calls'] += 1
+            self._stats['call_ms_total'] += elapsed_ms
+            self._stats['call_ms_max'] = max(self._stats['call_ms_max'], elapsed_ms)
+            if value is None:
+                self._stats['errors'] += 1
+            else:
+                self._entries.set(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['entries'] = len(self._entries)
+            s['inflight'] = len(self._inflight)
+        s['call_ms_avg'] = round(s['call_ms_total'] / s['calls'], 1) if s['calls'] else 0.0
+        lookups = s['hits'] + s['misses'] + s['coalesced']
+        s['hit_rate'] = round((s['hits'] + s['coalesced']) / lookups, 3) if lookups else 0.0
+        return s
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
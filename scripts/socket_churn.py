@@ -0,0 +1,111 @@
+"""Socket connect/disconnect churn against the presence and video-room state.
+
+Simulates `--connections` sockets (some users with several tabs, a share of
+them paired in video rooms), then churns them: random disconnects, each
+followed by a reconnect, and finally a disconnect storm (everyone drops, as
+after a network blip). Times MemoryStateStore against the pre-index layout
+(user -> sid dict and room member lists, scanned on every disconnect).
+
+    python scripts/socket_churn.py --connections 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime_state import MemoryStateStore
+
+
+class ScanningState:
+    """The state layout before reverse indexes: disconnect scans every user and every room."""
+
+    def __init__(self):
+        self.user_sockets = {}  # user_id -> socket_id
+        self.video_rooms = {}   # room_id -> [socket_id, ...]
+
+    def add_session(self, user_id, sid):
+        self.user_sockets[user_id] = sid
+
+    def join_room(self, room, sid):
+        members = self.video_rooms.setdefault(room, [])
+        if sid not in members:
+            members.append(sid)
+        return list(members)
+
+    def remove_socket(self, sid):
+        for user_id, user_sid in list(self.user_sockets.items()):
+            if user_sid == sid:
+                del self.user_sockets[user_id]
+
+    def leave_rooms(self, sid):
+        for room, members in list(self.video_rooms.items()):
+            if sid in members:
+                members.remove(sid)
+                if not members:
+                    del self.video_rooms[room]
+
+
+def run(state, connections, churn, rng):
+    """Returns (connect, churn, storm) phase timings as (ops, seconds)."""
+    users = max(1, int(connections * 0.8))  # About one in five users has a second tab
+    live, next_sid = [], 0
+
+    def connect():
+        nonlocal next_sid
+        sid = f's{next_sid}'
+        next_sid += 1
+        state.add_session(f'u{rng.randrange(users)}', sid)
+        if rng.random() < 0.3:  # In a call: pair up with the previous caller in the same room
+            state.join_room(f'room{next_sid // 2}', sid)
+        live.append(sid)
+
+    def disconnect(index):
+        live[index], live[-1] = live[-1], live[index]
+        sid = live.pop()
+        state.remove_socket(sid)
+        state.leave_rooms(sid)
+
+    started = time.perf_counter()
+    for _ in range(connections):
+        connect()
+    timings = [(connections, time.perf_counter() - started)]
+
+    started = time.perf_counter()
+    for _ in range(churn):
+        disconnect(rng.randrange(len(live)))
+        connect()
+    timings.append((churn, time.perf_counter() - started))
+
+    started = time.perf_counter()
+    storm = len(live)
+    while live:
+        disconnect(len(live) - 1)
+    timings.append((storm, time.perf_counter() - started))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--connections', type=int, default=10000)
+    parser.add_argument('--churn', type=int, default=50000, help='Disconnect+reconnect pairs.')
+    parser.add_argument('--scanning-churn', type=int, default=2000,
+                        help='Churn pairs for the scanning layout (each costs a full scan).')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rows = [('reverse indexes (MemoryStateStore)', run(MemoryStateStore(), args.connections, args.churn,
+                                                       random.Random(args.seed))),
+            ('scanning (before)', run(ScanningState(), args.connections, args.scanning_churn,
+                                      random.Random(args.seed)))]
+    print(f'{args.connections} connections\n')
+    print(f'{"":36} {"connect us/op":>14} {"churn us/op":>12} {"storm us/op":>12} {"storm total s":>14}')
+    for label, ((n_conn, t_conn), (n_churn, t_churn), (n_storm, t_storm)) in rows:
+        print(f'{label:36} {t_conn / n_conn * 1e6:>14.2f} {t_churn / max(n_churn, 1) * 1e6:>12.2f} '
+              f'{t_storm / n_storm * 1e6:>12.2f} {t_storm:>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
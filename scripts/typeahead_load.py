@@ -0,0 +1,142 @@
+"""Replay simulated typing sessions against the typeahead endpoints.
+
+Compares one request per keystroke with no server cache (how the endpoints
+were used before) against the current client behaviour: a 250ms debounce,
+the server's short-TTL result cache, the browser's 30s max-age and ETag
+revalidation (304s). Reports requests sent (and per second of typing),
+searches the server actually ran, SQL statements and total serving time.
+Searches run on the in-memory trigram index, so after the warm-up the SQL
+column should stay 0 in both modes; server searches are the load that remains.
+
+    python scripts/typeahead_load.py --sessions 500
+
+Runs against an in-memory SQLite database seeded like a fresh install, unless
+DATABASE_URL is set.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('GEMINI_API_KEY', 'unused')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+import app as telehealth
+
+# Responses carry Cache-Control: private, max-age=30
+BROWSER_MAX_AGE_MS = 30000
+SPECIALIZATIONS = ['Cardiologist', 'Dermatologist', 'Gynecologist', 'Neurologist', 'Pediatrician', 'General Physician']
+
+
+def typing_sessions(count, rng, per_browser=10):
+    """[(browser, endpoint, [(ms, text so far), ...])]: what each user typed and when.
+
+    Each browser runs `per_browser` sessions a few minutes apart, and some
+    sessions contain a typo that is backspaced, so queries repeat."""
+    sessions = []
+    started = {}
+    for i in range(count):
+        browser = i // per_browser
+        at = started[browser] = started.get(browser, 0) + rng.uniform(60000, 600000)
+        if rng.random() < 0.5:
+            endpoint = '/api/search_patients'
+            n = rng.randint(1, 30)
+            target = rng.choice([f'patient{n}', f'Patient Name {n}'])
+        else:
+            endpoint = '/api/search_specialists'
+            target = rng.choice(SPECIALIZATIONS + [f'doc{rng.randint(1, 30)}'])
+        typed = target[:rng.randint(3, len(target))]
+        texts = [typed[:i] for i in range(1, len(typed) + 1)]
+        if rng.random() < 0.3:
+            slip = rng.randint(1, len(texts) - 1)
+            texts[slip:slip] = [texts[slip - 1] + 'x', texts[slip - 1]]
+        keys = []
+        for text in texts:
+            # Mostly steady typing, with the occasional pause to look at the suggestions
+            at += rng.uniform(400, 1200) if rng.random() < 0.15 else min(max(rng.gauss(140, 60), 40), 600)
+            keys.append((at, text))
+        sessions.append((browser, endpoint, keys))
+    return sessions
+
+
+def debounced(keys, debounce_ms):
+    """Keystrokes that survive the client's debounce: no further key within debounce_ms."""
+    return [(at, text) for (at, text), nxt in zip(keys, keys[1:] + [(float('inf'), None)]) if nxt[0] - at >= debounce_ms]
+
+
+def replay(client, sessions, debounce_ms, cached):
+    statements = []
+    def record(*args):
+        statements.append(args[2])
+    with telehealth.app.app_context():
+        engine = telehealth.db.engine
+    telehealth.typeahead_cache.clear()
+    searches_before = telehealth.typeahead_cache.misses
+    event.listen(engine, 'before_cursor_execute', record)
+    browsers = {}  # browser -> {(endpoint, text): (etag, fetched at ms)}
+    sent = not_modified = browser_hits = 0
+    started = time.perf_counter()
+    try:
+        for browser, endpoint, keys in sessions:
+            cache = browsers.setdefault(browser, {})
+            fired = debounced(keys, debounce_ms) if debounce_ms else keys
+            for at, text in fired:
+                if len(text) < 2:
+                    continue  # The page doesn't search single characters
+                headers = {}
+                if cached and (endpoint, text) in cache:
+                    etag, fetched_at = cache[endpoint, text]
+                    if at - fetched_at < BROWSER_MAX_AGE_MS:
+                        browser_hits += 1
+                        continue
+                    headers['If-None-Match'] = etag
+                if not cached:
+                    telehealth.typeahead_cache.clear()
+                response = client.get(endpoint, query_string={'q': text}, headers=headers)
+                sent += 1
+                not_modified += response.status_code == 304
+                if response.headers.get('ETag'):
+                    cache[endpoint, text] = (response.headers['ETag'], at)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    elapsed = time.perf_counter() - started
+    return {'requests': sent, 'not_modified': not_modified, 'browser_hits': browser_hits,
+            'searches': telehealth.typeahead_cache.misses - searches_before, 'sql': len(statements), 'seconds': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--debounce-ms', type=int, default=250)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    telehealth.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    telehealth.init_db()
+    client = telehealth.app.test_client()
+    client.post('/login', data={'username': 'doc6', 'password': 'password'})
+    sessions = typing_sessions(args.sessions, random.Random(args.seed))
+    keystrokes = sum(len(keys) for _, _, keys in sessions)
+    replay(client, sessions[:20], 0, cached=False)  # Warm up: index build, session user
+
+    rows = [('per keystroke, no cache', replay(client, sessions, 0, cached=False)),
+            (f'{args.debounce_ms}ms debounce + cache + ETag', replay(client, sessions, args.debounce_ms, cached=True))]
+    typed_seconds = sum(keys[-1][0] - keys[0][0] for _, _, keys in sessions) / 1000
+    print(f'{args.sessions} typing sessions, {keystrokes} keystrokes, {typed_seconds:.0f}s of typing\n')
+    print(f'{"":36} {"requests":>9} {"req/s":>7} {"304s":>6} {"browser hits":>13} {"searches":>9} {"SQL":>5} '
+          f'{"serve ms":>9}')
+    for label, r in rows:
+        print(f'{label:36} {r["requests"]:>9} {r["requests"] / typed_seconds:>7.2f} {r["not_modified"]:>6} '
+              f'{r["browser_hits"]:>13} {r["searches"]:>9} {r["sql"]:>5} {r["seconds"] * 1000:>9.0f}')
+    base, new = rows[0][1], rows[1][1]
+    print(f'\nrequests: -{100 * (1 - new["requests"] / base["requests"]):.0f}%, '
+          f'server searches: -{100 * (1 - new["searches"] / base["searches"]):.0f}%, '
+          f'serving time: -{100 * (1 - new["seconds"] / base["seconds"]):.0f}%')
+
+
+if __name__ == '__main__':
+    main()
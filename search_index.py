@@ -0,0 +1,79 @@
+import time
+from collections import defaultdict
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each word padded with two leading spaces and one trailing."""
+    grams = set()
+    for word in (text or '').lower().split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """In-process trigram index for typeahead lookups.
+
+    Each entry has a few searchable texts and a ready-to-serve JSON payload, so a
+    search is a posting-list lookup with no database round trip. Results are
+    ranked by word-prefix match, then substring match, then trigram
+    similarity, then shortest text.
+    """
+
+    def __init__(self, min_similarity=0.5, max_age=300):
+        self.min_similarity = min_similarity
+        self.max_age = max_age  # Rebuild at least this often to pick up edits from other workers
+        self._built_at = None
+        self._postings = defaultdict(set)  # trigram -> {key}
+        self._entries = {}                 # key -> (texts, grams, payload)
+        self.generation = 0                # Bumped on every change so result caches can key on it
+
+    def invalidate(self):
+        self._built_at = None
+
+    def ensure_fresh(self, load_entries):
+        """Rebuild from `load_entries()` -> [(key, texts, payload)] if invalidated or stale."""
+        if self._built_at is None or time.monotonic() - self._built_at > self.max_age:
+            self._postings = defaultdict(set)
+            self._entries = {}
+            for key, texts, payload in load_entries():
+                self.upsert(key, texts, payload)
+            self.generation += 1
+            self._built_at = time.monotonic()
+
+    def upsert(self, key, texts, payload):
+        self.remove(key)
+        self.generation += 1
+        texts = [t.lower() for t in texts if t]
+        grams = set().union(*(trigrams(t) for t in texts)) if texts else set()
+        for gram in grams:
+            self._postings[gram].add(key)
+        self._entries[key] = (texts, grams, payload)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.generation += 1
+            for gram in entry[1]:
+                self._postings[gram].discard(key)
+
+    def search(self, q, limit=10):
+        q = (q or '').lower().strip()
+        query_grams = trigrams(q)
+        if not query_grams:
+            return []
+        hits = defaultdict(int)
+        for gram in query_grams:
+            for key in self._postings.get(gram, ()):
+                hits[key] += 1
+
+        ranked = []
+        for key, shared in hits.items():
+            texts, _, payload = self._entries[key]
+            similarity = shared / len(query_grams)
+            prefix = any(t.startswith(q) or f' {q}' in t for t in texts)
+            contains = prefix or any(q in t for t in texts)
+            if contains or similarity >= self.min_similarity:
+                ranked.append((not prefix, not contains, -similarity, min(len(t) for t in texts), key, payload))
+        ranked.sort(key=lambda r: r[:5])
+        return [r[5] for r in ranked[:limit]]
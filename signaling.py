@@ -0,0 +1,76 @@
+import time
+from collections import Counter
+
+# Call-setup helpers for the WebRTC signaling handlers.
+# IceBatcher coalesces trickle ICE candidates so a burst of them crosses the
+# wire as one message; SignalingRateLimiter caps how fast any one socket can
+# push offer/answer/ice/join events.
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate          # tokens added per second
+        self.capacity = capacity  # burst size
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def allow(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class SignalingRateLimiter:
+    """Per-socket token buckets for signaling events."""
+
+    def __init__(self, rate=10, burst=40):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # sid -> TokenBucket
+
+    def allow(self, sid):
+        bucket = self._buckets.get(sid)
+        if bucket is None:
+            bucket = self._buckets[sid] = TokenBucket(self.rate, self.burst)
+        return bucket.allow()
+
+    def forget(self, sid):
+        self._buckets.pop(sid, None)
+
+
+class IceBatcher:
+    """Coalesce trickled ICE candidates per (room, sender) over a short window.
+
+    The first candidate for a key schedules a flush `window` seconds later; any
+    candidates arriving meanwhile ride along in the same message.
+    `flush(room, sid, candidates)` does the actual emit.
+    """
+
+    def __init__(self, flush, start_task, sleep, window=0.05):
+        self.flush = flush
+        self.start_task = start_task
+        self.sleep = sleep
+        self.window = window
+        self._pending = {}  # (room, sid) -> [candidate, ...]
+
+    def add(self, room, sid, candidates):
+        key = (room, sid)
+        if key in self._pending:
+            self._pending[key].extend(candidates)
+            return
+        self._pending[key] = list(candidates)
+        self.start_task(self._flush_later, key)
+
+    def _flush_later(self, key):
+        self.sleep(self.window)
+        candidates = self._pending.pop(key, None)
+        if candidates:
+            self.flush(key[0], key[1], candidates)
+
+
+# Message counters for call setup (received from clients / emitted to clients / dropped by the limiter)
+signaling_stats = Counter()
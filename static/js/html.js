@@ -0,0 +1,8 @@
+// Shared helpers for templates that build HTML strings from JSON.
+
+// Escape untrusted text (patient names, symptoms, ...) before putting it in innerHTML
+function esc(text) {
+    const div = document.createElement('div');
+    div.innerText = text == null ? '' : text;
+    return div.innerHTML;
+}
@@ -0,0 +1,71 @@
+// Patient medical timeline: renders pages of /api/patients/<id>/timeline into
+// a list, newest first, with a button that fetches the next (older) page.
+
+const TIMELINE_LABELS = {
+    case_opened: 'Case opened',
+    vitals: 'Vitals recorded',
+    prescription: 'Prescription',
+    report: 'Report uploaded',
+    specialist_assigned: 'Specialist assigned',
+    case_closed: 'Case closed'
+};
+
+function timelineText(e) {
+    switch (e.kind) {
+        case 'case_opened':
+            return (e.symptoms || '') + (e.specialist ? ` (for ${e.specialist})` : '') + (e.by ? ` - opened by ${e.by}` : '');
+        case 'vitals':
+            return [e.bp && `BP ${e.bp}`, e.hr != null && `HR ${e.hr}`, e.spo2 != null && `SpO2 ${e.spo2}%`,
+                    e.temp != null && `Temp ${e.temp}°C`].filter(Boolean).join(' | ');
+        case 'prescription':
+            return e.medicine + (e.dosage ? ` (${e.dosage})` : '') + (e.by ? ` - ${e.by}` : '');
+        case 'report':
+            return (e.description || e.name || '') + (e.type ? ` [${e.type}]` : '');
+        case 'specialist_assigned':
+            return e.specialist + (e.by ? ` - by ${e.by}` : '');
+        case 'case_closed':
+            return e.by ? `by ${e.by}` : '';
+    }
+    return '';
+}
+
+function timelineItem(e) {
+    const li = document.createElement('li');
+    li.className = 'list-group-item px-2 py-1 small';
+    const head = document.createElement('div');
+    head.className = 'd-flex justify-content-between text-muted';
+    const label = document.createElement(e.case ? 'a' : 'span');
+    label.innerText = TIMELINE_LABELS[e.kind] || e.kind;
+    if (e.case) label.href = `/doctor/case/${e.case}`;
+    const when = document.createElement('span');
+    when.innerText = e.t.replace('T', ' ').slice(0, 16);
+    head.append(label, when);
+    const body = document.createElement(e.kind === 'report' && e.ref ? 'a' : 'div');
+    body.innerText = timelineText(e);
+    if (e.kind === 'report' && e.ref) {
+        body.href = `/reports/${e.ref}`;
+        body.target = '_blank';
+    }
+    li.append(head, body);
+    return li;
+}
+
+async function loadTimeline(patientId, list, more) {
+    const params = new URLSearchParams({limit: 30});
+    if (more.dataset.cursor) params.set('cursor', more.dataset.cursor);
+    more.disabled = true;
+    try {
+        const res = await fetch(`/api/patients/${patientId}/timeline?${params}`);
+        const data = await res.json();
+        if (!more.dataset.cursor && data.events.length === 0) {
+            list.innerHTML = '<li class="list-group-item small text-muted">No history yet.</li>';
+        }
+        data.events.forEach(e => list.appendChild(timelineItem(e)));
+        more.dataset.cursor = data.next_cursor || '';
+        more.classList.toggle('d-none', !data.next_cursor);
+    } catch (err) {
+        console.error('Failed to load timeline:', err);
+    } finally {
+        more.disabled = false;
+    }
+}
@@ -7,6 +7,10 @@ let localStream;
 let pc;
 let isInitiator = false;
 
+const ICE_BATCH_MS = 100;
+let pendingCandidates = [];
+let candidateTimer = null;
+
 const config = {
     iceServers: [
         { urls: "stun:stun.l.google.com:19302" },
@@ -80,6 +84,18 @@ async function initMedia() {
     }
 }
 
+function flushCandidates() {
+    clearTimeout(candidateTimer);
+    candidateTimer = null;
+    if (pendingCandidates.length === 0) return;
+    console.log("🧊 Sending", pendingCandidates.length, "ICE candidates");
+    socket.emit("ice_candidates", {
+        room: ROOM_ID,
+        candidates: pendingCandidates
+    });
+    pendingCandidates = [];
+}
+
 function createPeerConnection() {
     if (pc) {
         console.log("⚠️ Peer connection already exists");
@@ -105,15 +121,16 @@ function createPeerConnection() {
         }
     };
 
-    // Handle ICE candidates
+    // Handle ICE candidates: buffer trickled candidates and send them in
+    // batches so call setup is a few messages instead of one per candidate
     pc.onicecandidate = event => {
         if (event.candidate) {
-            console.log("🧊 Sending ICE candidate");
-            socket.emit("ice_candidate", {
-                room: ROOM_ID,
-                candidate: event.candidate
-            });
+            pendingCandidates.push(event.candidate);
+            if (!candidateTimer) {
+                candidateTimer = setTimeout(flushCandidates, ICE_BATCH_MS);
+            }
         } else {
+            flushCandidates();
             console.log("🧊 All ICE candidates sent");
         }
     };
@@ -214,17 +231,27 @@ socket.on("answer", async data => {
     }
 });
 
-// Handle ICE candidates from remote peer
-socket.on("ice_candidate", async data => {
-    console.log("📥 Received ICE candidate");
+// Handle ICE candidates from remote peer (batched by the server)
+async function addRemoteCandidate(candidate) {
     try {
-        if (pc && data.candidate) {
-            await pc.addIceCandidate(new RTCIceCandidate(data.candidate));
-            console.log("✅ Added ICE candidate");
+        if (pc && candidate) {
+            await pc.addIceCandidate(new RTCIceCandidate(candidate));
         }
     } catch (err) {
         console.error("❌ Error adding ICE candidate:", err);
     }
+}
+
+socket.on("ice_candidates", async data => {
+    console.log("📥 Received", data.candidates.length, "ICE candidates");
+    for (const candidate of data.candidates) {
+        await addRemoteCandidate(candidate);
+    }
+});
+
+socket.on("ice_candidate", async data => {
+    console.log("📥 Received ICE candidate");
+    await addRemoteCandidate(data.candidate);
 });
 
 // Handle user left
@@ -248,6 +275,8 @@ socket.on("call_ended", () => {
 });
 
 function cleanup() {
+    clearTimeout(candidateTimer);
+    pendingCandidates = [];
     if (pc) {
         pc.close();
         pc = null;
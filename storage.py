@@ -0,0 +1,141 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+# Content-addressed storage for report files. Blobs are keyed by the SHA-256
+# of their bytes, so the same PDF attached to several cases (or re-uploaded
+# after a failed submit) is stored once. Which reports point at a blob, and
+# how many, is tracked by models.ReportBlob; the backends only move bytes.
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BlobStorage:
+    """Interface for report blob backends. Keys are lowercase SHA-256 hex digests."""
+
+    def put(self, key, src_path):
+        """Take ownership of the file at src_path and store it under key."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def open(self, key):
+        """Readable binary file-like object for the blob."""
+        raise NotImplementedError
+
+    def size(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def local_path(self, key):
+        """Filesystem path of the blob, or None if it does not live on local disk."""
+        return None
+
+    def url(self, key, filename=None, expires=300):
+        """Short-lived direct download URL, or None if the backend has none."""
+        return None
+
+
+class LocalStorage(BlobStorage):
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def local_path(self, key):
+        # Two-level fan-out keeps directories small: ab/abcdef...
+        return os.path.join(self.root, key[:2], key)
+
+    def put(self, key, src_path):
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A temp name of its own, so concurrent puts of the same content can't
+        # replace each other's half-moved file; os.replace is then atomic.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.move(src_path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def exists(self, key):
+        return os.path.exists(self.local_path(key))
+
+    def open(self, key):
+        return open(self.local_path(key), 'rb')
+
+    def size(self, key):
+        return os.path.getsize(self.local_path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage(BlobStorage):
+    """S3 or an S3-compatible service (MinIO, Ceph, ...). Requires the `boto3` package."""
+
+    def __init__(self, bucket, prefix='reports/', endpoint_url=None, client=None):
+        if client is None:
+            import boto3
+            client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def put(self, key, src_path):
+        self.client.upload_file(src_path, self.bucket, self._key(key))
+        os.remove(src_path)
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+
+    def size(self, key):
+        return self._head(key)['ContentLength']
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def url(self, key, filename=None, expires=300):
+        params = {'Bucket': self.bucket, 'Key': self._key(key)}
+        if filename:
+            params['ResponseContentDisposition'] = f'inline; filename="{filename}"'
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires)
+
+
+def create_storage(url, default_root):
+    """S3Storage for s3://bucket/prefix (endpoint from S3_ENDPOINT_URL), otherwise LocalStorage."""
+    if url and url.startswith('s3://'):
+        bucket, _, prefix = url[len('s3://'):].partition('/')
+        return S3Storage(bucket, prefix=prefix.rstrip('/') + '/' if prefix else '',
+                         endpoint_url=os.environ.get('S3_ENDPOINT_URL'))
+    return LocalStorage(url or default_root)
@@ -0,0 +1,174 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+# In-process background task queue. Slow work (Gemini calls, preview
+# rendering) is enqueued from a request, which returns a job id straight away;
+# worker greenlets run the job, retry it with exponential backoff if it raises,
+# and call on_finish so the app can push the result to the user.
+#
+# Job state lives in a store: MemoryJobStore by default, or SQLiteJobStore
+# (a local SQLite table) so jobs queued or running when the process stopped
+# are picked up again on the next start. Arguments and results must be
+# JSON-serialisable.
+
+FINISHED = ('done', 'failed')
+
+
+class MemoryJobStore:
+    def __init__(self, max_jobs=10000):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+
+    def save(self, job):
+        self._jobs[job['id']] = dict(job)
+        self._jobs.move_to_end(job['id'])
+        # Forget the oldest jobs, finished or not, once over the limit
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def unfinished(self):
+        return []  # Nothing survives a restart
+
+
+class SQLiteJobStore:
+    COLUMNS = ('id', 'name', 'args', 'user_id', 'state', 'attempts', 'result', 'error', 'created_at', 'updated_at')
+
+    def __init__(self, path, keep_finished=7 * 24 * 3600):
+        self.keep_finished = keep_finished
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, name TEXT NOT NULL, args TEXT, user_id TEXT, '
+            'state TEXT NOT NULL, attempts INTEGER NOT NULL, result TEXT, error TEXT, '
+            'created_at REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_jobs_state ON jobs (state, created_at)')
+
+    def save(self, job):
+        row = dict(job, args=json.dumps(job['args']), result=json.dumps(job['result']))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                [row[c] for c in self.COLUMNS]
+            )
+
+    def _load(self, row):
+        job = dict(zip(self.COLUMNS, row))
+        job['args'] = json.loads(job['args'])
+        job['result'] = json.loads(job['result'])
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._load(row) if row else None
+
+    def unfinished(self):
+        """Jobs that were queued or running when the process stopped, oldest first. Also prunes old finished jobs."""
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE state IN ('done', 'failed') AND updated_at < ?",
+                               (time.time() - self.keep_finished,))
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE state IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self._load(row) for row in rows]
+
+
+class TaskQueue:
+    def __init__(self, store, start_task, sleep, workers=4, context=None, on_finish=None):
+        self.store = store
+        self.start_task = start_task  # Spawns a worker (socketio.start_background_task)
+        self.sleep = sleep
+        self.workers = workers
+        self.context = context        # Callable returning a context manager each job runs in (app.app_context)
+        self.on_finish = on_finish    # Called with the job dict once it is done or has failed for good
+        self._tasks = {}              # name -> (fn, retries, backoff)
+        self._queue = queue.Queue()
+        self._started = False
+
+    def task(self, name=None, retries=2, backoff=1.0):
+        """Decorator registering a function as a task. It is retried up to
+        `retries` times, waiting backoff, 2*backoff, ... seconds in between."""
+        def register(fn):
+            self._tasks[name or fn.__name__] = (fn, retries, backoff)
+            return fn
+        return register
+
+    def start(self):
+        """Start the workers and re-queue jobs a durable store still has pending."""
+        if self._started:
+            return
+        self._started = True
+        for _ in range(self.workers):
+            self.start_task(self._worker)
+        for job in self.store.unfinished():
+            if job['name'] in self._tasks:
+                job['state'] = 'queued'
+                self.store.save(job)
+                self._queue.put(job['id'])
+
+    def enqueue(self, name, *args, user_id=None):
+        if name not in self._tasks:
+            raise KeyError(f'Unknown task {name}')
+        self.start()
+        now = time.time()
+        job = {'id': uuid.uuid4().hex, 'name': name, 'args': list(args), 'user_id': user_id,
+               'state': 'queued', 'attempts': 0, 'result': None, 'error': None,
+               'created_at': now, 'updated_at': now}
+        self.store.save(job)
+        self._queue.put(job['id'])
+        return job['id']
+
+    def status(self, job_id):
+        return self.store.get(job_id)
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception:
+                traceback.print_exc()
+
+    def _run(self, job_id):
+        job = self.store.get(job_id)
+        if not job or job['state'] in FINISHED:
+            return
+        fn, retries, backoff = self._tasks[job['name']]
+        job.update(state='running', attempts=job['attempts'] + 1, updated_at=time.time())
+        self.store.save(job)
+        try:
+            if self.context:
+                with self.context():
+                    result = fn(*job['args'])
+            else:
+                result = fn(*job['args'])
+            job.update(state='done', result=result, error=None)
+        except Exception as e:
+            job['error'] = str(e)
+            if job['attempts'] <= retries:
+                job.update(state='queued', updated_at=time.time())
+                self.store.save(job)
+                self.start_task(self._retry_later, job_id, backoff * 2 ** (job['attempts'] - 1))
+                return
+            print(f"Task {job['name']} ({job_id}) failed after {job['attempts']} attempts: {e}")
+            job['state'] = 'failed'
+        job['updated_at'] = time.time()
+        self.store.save(job)
+        if self.on_finish:
+            self.on_finish(job)
+
+    def _retry_later(self, job_id, delay):
+        self.sleep(delay)
+        self._queue.put(job_id)
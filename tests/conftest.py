@@ -0,0 +1,56 @@
+import contextlib
+import os
+import sys
+
+# In-memory SQLite, configured before app.py reads the environment
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import event
+
+import app as telehealth
+
+
+@pytest.fixture(scope='session')
+def app():
+    """The app on a migrated and seeded in-memory database (doc1-30, patient1-30)."""
+    telehealth.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    telehealth.get_specialist_recommendation = lambda symptoms, vitals: 'General Physician'
+    telehealth.init_db()
+    return telehealth.app
+
+
+@pytest.fixture
+def db(app):
+    with app.app_context():
+        yield telehealth.db
+
+
+@pytest.fixture
+def login(app):
+    def login(username, password='password'):
+        client = app.test_client()
+        response = client.post('/login', data={'username': username, 'password': password})
+        assert response.status_code == 302
+        return client
+    return login
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager yielding a list that collects every SQL statement run inside it."""
+    @contextlib.contextmanager
+    def count_queries():
+        statements = []
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        with app.app_context():
+            engine = telehealth.db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+    return count_queries
@@ -0,0 +1,95 @@
+import pytest
+
+import app as telehealth
+from medication_safety import PatientSafetyIndex
+from models import Case, DoctorProfile, PatientProfile, Prescription, User
+
+
+@pytest.fixture
+def patient_case(db):
+    """An active case under doc8 for a patient whose medical history is replaced."""
+    def patient_case(username, medical_history):
+        patient = PatientProfile.query.join(User).filter(User.username == username).one()
+        patient.medical_history = medical_history
+        doctor = DoctorProfile.query.join(User).filter(User.username == 'doc8').one()
+        case = Case(patient_profile_id=patient.id, symptoms='review', status='active', doctor_profile_id=doctor.id)
+        db.session.add(case)
+        db.session.commit()
+        telehealth.medication_safety.invalidate(patient.id)
+        return case
+    return patient_case
+
+
+def prescribe(client, case, medicine, override=False):
+    data = {'medicine_details': medicine, 'dosage': '1 tab'}
+    if override:
+        data['override_safety'] = 'y'
+    response = client.post(f'/doctor/case/{case.id}/add_prescription', data=data, follow_redirects=True)
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def medicines(case):
+    return [p.medicine for p in Prescription.query.filter_by(case_id=case.id).order_by(Prescription.id)]
+
+
+def test_allergy_blocks_the_prescription(db, login, patient_case):
+    case = patient_case('patient1', 'Allergic to Penicillin.')
+    client = login('doc8')
+
+    page = prescribe(client, case, 'Amoxicillin 500mg')
+    assert 'amoxicillin: patient is allergic to penicillin' in page
+    assert 'Prescription not saved' in page
+    assert medicines(case) == []
+
+    findings = client.post(f'/api/cases/{case.id}/prescriptions/check', json={'medicine': 'Cefalexin 250mg'}).get_json()
+    assert findings['blocking'] is False
+    assert [f['kind'] for f in findings['findings']] == ['cross_reactivity']
+
+
+def test_negated_allergies_are_not_allergies():
+    for history in ('No allergy to penicillin.', 'Denies drug allergies. Takes penicillin for tonsillitis.',
+                    'NKDA. Not allergic to amoxicillin or any penicillin.'):
+        index = PatientSafetyIndex(None, history, [])
+        assert index.allergens == {}, history
+        assert index.check('Amoxicillin 500mg') == []
+
+    index = PatientSafetyIndex(None, 'Allergic to penicillin with no anaphylaxis, denies other allergies.', [])
+    assert [f['kind'] for f in index.check('Amoxicillin 500mg')] == ['allergy']
+
+
+def test_major_interaction_blocks_unless_overridden(db, login, patient_case):
+    case = patient_case('patient3', 'No significant history.')
+    db.session.add(Prescription(case_id=case.id, author_profile_id=case.doctor_profile_id, medicine='Warfarin 5mg'))
+    db.session.commit()
+    client = login('doc8')
+
+    page = prescribe(client, case, 'Ibuprofen 400mg')
+    assert 'ibuprofen + warfarin: bleeding risk' in page
+    assert medicines(case) == ['Warfarin 5mg']
+
+    page = prescribe(client, case, 'Ibuprofen 400mg', override=True)
+    assert 'Prescription added.' in page
+    assert 'Safety warning: ibuprofen + warfarin: bleeding risk' in page
+    assert medicines(case) == ['Warfarin 5mg', 'Ibuprofen 400mg']
+
+    recheck = client.get(f'/api/patients/{case.patient_profile_id}/medication_safety').get_json()
+    assert [(f['kind'], f['severity']) for f in recheck['findings']] == [('interaction', 'major')]
+
+
+def test_cached_checks_skip_the_database_until_invalidated(db, patient_case, count_queries):
+    case = patient_case('patient5', 'Allergic to sulfa drugs.')
+    safety = telehealth.medication_safety
+    patient_id = case.patient_profile_id
+    assert safety.check(patient_id, 'Co-trimoxazole DS')[0]['kind'] == 'allergy'
+
+    with count_queries() as statements:
+        assert safety.check(patient_id, 'Co-trimoxazole DS')[0]['kind'] == 'allergy'
+    assert statements == []
+
+    db.session.add(Prescription(case_id=case.id, author_profile_id=case.doctor_profile_id, medicine='Sertraline 50mg'))
+    db.session.commit()
+    assert safety.check(patient_id, 'Fluoxetine 20mg') == []  # Cached; another worker's write is not seen yet
+    assert [f['kind'] for f in safety.check(patient_id, 'Fluoxetine 20mg', fresh=True)] == ['duplicate']
+    safety.invalidate(patient_id)
+    assert [f['kind'] for f in safety.check(patient_id, 'Fluoxetine 20mg')] == ['duplicate']
@@ -0,0 +1,93 @@
+import app as telehealth
+from models import Case, DoctorProfile, DoctorWorkload, PatientProfile, Prescription, Report, User
+
+
+def add_cases(db, n, patient_names, generalist, specialist):
+    """n active cases, each with a different patient, all under the same two doctors."""
+    patients = [PatientProfile.query.join(User).filter(User.username == name).one() for name in patient_names]
+    for i in range(n):
+        db.session.add(Case(patient_profile_id=patients[i % len(patients)].id, symptoms=f'case {i}',
+                            status='active', doctor_profile_id=generalist.id, specialist_profile_id=specialist.id))
+    db.session.commit()
+
+
+def doctor(username):
+    return DoctorProfile.query.join(User).filter(User.username == username).one()
+
+
+def page_queries(client, count_queries, path):
+    client.get(path)  # Warm the session-user cache
+    with count_queries() as statements:
+        assert client.get(path).status_code == 200
+    return len(statements)
+
+
+def test_doctor_dashboard_query_count_is_independent_of_cases(db, login, count_queries):
+    generalist, specialist = doctor('doc18'), doctor('doc19')
+    client = login('doc18')
+    add_cases(db, 2, ['patient10', 'patient11'], generalist, specialist)
+    few = page_queries(client, count_queries, '/doctor/dashboard')
+    add_cases(db, 15, [f'patient{i}' for i in range(12, 27)], generalist, specialist)
+    many = page_queries(client, count_queries, '/doctor/dashboard')
+    assert many == few
+    assert few <= 6
+
+
+def test_patient_dashboard_query_count_is_independent_of_cases(db, login, count_queries):
+    client = login('patient27')
+    add_cases(db, 2, ['patient27'], doctor('doc20'), doctor('doc21'))
+    few = page_queries(client, count_queries, '/patient/dashboard')
+    for gp, spec in [('doc22', 'doc23'), ('doc24', 'doc25'), ('doc26', 'doc27'), ('doc28', 'doc29')]:
+        add_cases(db, 3, ['patient27'], doctor(gp), doctor(spec))
+    many = page_queries(client, count_queries, '/patient/dashboard')
+    assert many == few
+    assert few <= 4
+
+
+def test_case_page_query_count_is_independent_of_reports_and_prescriptions(db, login, count_queries):
+    generalist = doctor('doc30')
+    add_cases(db, 1, ['patient28'], generalist, doctor('doc2'))
+    case = Case.query.filter_by(doctor_profile_id=generalist.id).one()
+    client = login('doc30')
+
+    def add_records(n):
+        for i in range(n):
+            db.session.add(Report(case_id=case.id, file_path=f'r{i}.pdf', file_type='PDF', description=f'report {i}'))
+            db.session.add(Prescription(case_id=case.id, author_profile_id=doctor(f'doc{3 + i}').id,
+                                        medicine=f'Medicine {i}', dosage='od'))
+        db.session.commit()
+
+    add_records(1)
+    few = page_queries(client, count_queries, f'/doctor/case/{case.id}')
+    add_records(10)
+    many = page_queries(client, count_queries, f'/doctor/case/{case.id}')
+    assert many == few
+
+
+def test_recommendation_reads_workloads_only_for_nearby_candidates(db, count_queries):
+    patient = PatientProfile.query.join(User).filter(User.username == 'patient29').one()
+    case = Case(patient_profile_id=patient.id, symptoms='fever', status='open')
+    db.session.add(case)
+    db.session.commit()
+    for doc in DoctorProfile.query.all():
+        db.session.merge(DoctorWorkload(doctor_profile_id=doc.id, active_cases=1))
+    db.session.commit()
+
+    with count_queries() as statements:
+        result = telehealth.recommend_doctor_job(case.id, None)
+    workload_queries = [s for s in statements if 'doctor_workloads' in s]
+    assert len(workload_queries) == 1
+    assert 'IN' in workload_queries[0]
+    assert len(statements) <= 5
+    # Every seeded GP is equally busy, so distance alone orders them
+    distances = [d['distance_km'] for d in result['doctors']]
+    assert distances == sorted(distances) and {d['active_cases'] for d in result['doctors']} == {1}
+
+    db.session.merge(DoctorWorkload(doctor_profile_id=result['doctors'][0]['doc_id'], active_cases=50))
+    db.session.commit()
+    reranked = telehealth.recommend_doctor_job(case.id, None)
+    assert reranked['doctors'][-1]['doc_id'] == result['doctors'][0]['doc_id']
+    assert reranked['doctors'][-1]['active_cases'] == 50
+
+    DoctorWorkload.query.delete()
+    db.session.commit()
@@ -0,0 +1,54 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import event
+
+from models import DoctorProfile
+import queries
+import triage_queue
+
+
+def query_plans(db, call):
+    """Run `call()` and return SQLite's EXPLAIN QUERY PLAN for each statement it issued."""
+    statements = []
+    def record(conn, cursor, statement, parameters, *args):
+        statements.append((statement, parameters))
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        call()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    connection = db.session.connection()
+    return ['\n'.join(row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters))
+            for statement, parameters in statements]
+
+
+def test_specialist_triage_queue_uses_status_specialist_index(db):
+    [plan] = query_plans(db, lambda: triage_queue.open_cases('Cardiologist'))
+    assert 'USING INDEX ix_cases_status_specialist_created (status=? AND required_specialist=?)' in plan
+    assert 'TEMP B-TREE' not in plan  # Already in created_at order
+
+
+def test_general_triage_queue_uses_status_specialist_index(db):
+    # NULL-or-'General Physician' is an OR, so only the status prefix of the index applies
+    [plan] = query_plans(db, lambda: triage_queue.open_cases(triage_queue.GENERAL))
+    assert 'USING INDEX ix_cases_status_specialist_created' in plan
+
+
+def test_case_listings_use_their_keyset_indexes(db):
+    doctor_id = DoctorProfile.query.first().id
+    cursor = queries.encode_cursor(SimpleNamespace(created_at=datetime.utcnow(), id='f' * 36))
+    for scope, index in [('generalist', 'ix_cases_generalist_created'), ('specialist', 'ix_cases_specialist_created'),
+                         ('patient', 'ix_cases_patient_created')]:
+        for page_cursor in (None, cursor):
+            [plan] = query_plans(db, lambda: queries.case_page(scope, doctor_id, cursor=page_cursor))
+            assert f'cases USING INDEX {index}' in plan, plan
+            assert 'TEMP B-TREE' not in plan, plan
+
+
+def test_doctor_approval_filters_use_approved_specialization_index(db):
+    for call in (lambda: DoctorProfile.query.filter_by(is_approved=False).all(),
+                 lambda: DoctorProfile.query.filter(DoctorProfile.is_approved == True,
+                                                    DoctorProfile.specialization == 'Cardiologist').all()):
+        [plan] = query_plans(db, call)
+        assert 'USING INDEX ix_doctor_profiles_approved_specialization' in plan
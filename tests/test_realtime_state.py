@@ -0,0 +1,126 @@
+import types
+
+import pytest
+
+import realtime_state
+from realtime_state import MemoryStateStore, RedisStateStore, create_state_store
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(realtime_state, 'time', types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def redis_server():
+    fakeredis = pytest.importorskip('fakeredis')
+    return fakeredis.FakeServer()
+
+
+def redis_store(server, **kwargs):
+    import fakeredis
+    return RedisStateStore(client=fakeredis.FakeRedis(server=server, decode_responses=True), **kwargs)
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def store(request, clock):
+    if request.param == 'memory':
+        return MemoryStateStore(presence_ttl=90)
+    return redis_store(request.getfixturevalue('redis_server'), presence_ttl=90)
+
+
+def leftover_state(store):
+    """Everything the store still holds apart from last_seen, which outlives sessions on purpose."""
+    if isinstance(store, MemoryStateStore):
+        return [name for name in ('user_sessions', 'socket_users', 'video_rooms', 'socket_rooms')
+                if getattr(store, name)]
+    return sorted(k for k in store.redis.keys('*') if k != store._key('last_seen'))
+
+
+def test_join_and_leave_room(store, clock):
+    assert store.join_room('call-1', 'caller') == ['caller']
+    clock.now += 1
+    assert store.join_room('call-1', 'callee') == ['caller', 'callee']
+    assert store.join_room('call-1', 'caller') == ['caller', 'callee']  # Rejoining keeps the caller first
+
+    assert store.leave_rooms('caller') == ['call-1']
+    assert store.leave_rooms('caller') == []
+    clock.now += 1
+    assert store.join_room('call-1', 'caller') == ['callee', 'caller']
+
+    assert sorted(store.pop_room('call-1')) == ['callee', 'caller']
+    assert store.leave_rooms('callee') == []  # pop_room also cleared the reverse index
+    assert leftover_state(store) == []
+
+
+def test_presence_across_sessions_of_one_user(store, clock):
+    store.add_session(7, 'laptop')
+    store.add_session(7, 'phone')
+    assert sorted(store.sessions(7)) == ['laptop', 'phone']
+
+    # Closing one tab or device leaves the user online
+    assert store.remove_socket('laptop') == []
+    assert store.is_online(7)
+    assert store.online_status([7, 8]) == {7: {'online': True, 'last_seen': clock.now},
+                                           8: {'online': False, 'last_seen': None}}
+
+    # A session that stops sending heartbeats expires; a heartbeat brings it back
+    clock.now += 91
+    assert not store.is_online(7)
+    store.touch('phone')
+    assert store.online_status([7])[7] == {'online': True, 'last_seen': clock.now}
+
+    clock.now += 5
+    assert store.remove_socket('phone') == [7]
+    assert store.online_status([7])[7] == {'online': False, 'last_seen': clock.now}
+    assert store.remove_socket('phone') == []
+    store.touch('phone')  # A late heartbeat from a closed socket is ignored
+    assert not store.is_online(7)
+    assert store.online_status([]) == {}
+
+
+def test_disconnect_cleans_up_through_reverse_indexes(store):
+    store.add_session(1, 'doctor-sid')
+    store.add_session(2, 'patient-sid')
+    for room in ('call-1', 'call-2'):
+        store.join_room(room, 'doctor-sid')
+    store.join_room('call-1', 'patient-sid')
+
+    # What handle_disconnect does
+    assert store.remove_socket('doctor-sid') == [1]
+    assert sorted(store.leave_rooms('doctor-sid')) == ['call-1', 'call-2']
+
+    assert store.join_room('call-1', 'patient-sid') == ['patient-sid']
+    assert store.pop_room('call-2') == []
+    assert store.remove_socket('patient-sid') == [2]
+    assert store.leave_rooms('patient-sid') == ['call-1']
+    assert leftover_state(store) == []
+
+
+def test_redis_state_is_shared_between_workers(redis_server, clock):
+    worker_a, worker_b = redis_store(redis_server), redis_store(redis_server)
+    worker_a.add_session(3, 'sid-on-a')
+    worker_a.join_room('call-9', 'sid-on-a')
+    clock.now += 1
+
+    assert worker_b.is_online(3)
+    assert worker_b.join_room('call-9', 'sid-on-b') == ['sid-on-a', 'sid-on-b']
+    assert worker_b.remove_socket('sid-on-a') == [3]
+    assert not worker_a.is_online(3)
+
+
+def test_create_state_store_picks_backend_from_url(redis_server):
+    assert isinstance(create_state_store(None), MemoryStateStore)
+    assert isinstance(create_state_store('amqp://localhost'), MemoryStateStore)
+    pytest.importorskip('redis')
+    assert isinstance(create_state_store('redis://localhost:6379/0'), RedisStateStore)  # Connects lazily
@@ -0,0 +1,144 @@
+import io
+
+import pytest
+
+import app as telehealth
+from models import Case, DoctorProfile, PatientProfile, Report, ReportBlob, User
+from storage import LocalStorage, S3Storage, create_storage
+
+BUCKET = 'reports-test'
+
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    """S3Storage against moto's in-process S3, with a fresh bucket."""
+    boto3 = pytest.importorskip('boto3')
+    moto = pytest.importorskip('moto')
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN'):
+        monkeypatch.setenv(name, 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield S3Storage(BUCKET, prefix='reports/', client=client)
+
+
+def write_tmp(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_s3_put_exists_open_delete(s3_storage, tmp_path):
+    key = 'ab' * 32
+    src = write_tmp(tmp_path, 'upload', b'%PDF-1.4 report')
+    assert not s3_storage.exists(key)
+
+    s3_storage.put(key, src)
+    assert s3_storage.exists(key)
+    assert not (tmp_path / 'upload').exists()  # put takes ownership of the file
+    assert s3_storage.size(key) == len(b'%PDF-1.4 report')
+    assert s3_storage.open(key).read() == b'%PDF-1.4 report'
+    assert s3_storage.client.head_object(Bucket=BUCKET, Key='reports/' + key)
+
+    s3_storage.delete(key)
+    assert not s3_storage.exists(key)
+    s3_storage.delete(key)  # Deleting a missing blob is not an error
+
+
+def test_s3_url_is_a_working_presigned_download(s3_storage, tmp_path):
+    requests = pytest.importorskip('requests')
+    key = 'cd' * 32
+    s3_storage.put(key, write_tmp(tmp_path, 'upload', b'scan bytes'))
+    url = s3_storage.url(key, 'scan.pdf', expires=60)
+    assert f'reports/{key}' in url and 'Signature=' in url
+
+    response = requests.get(url)  # moto answers presigned URLs too
+    assert response.content == b'scan bytes'
+    assert response.headers['Content-Disposition'] == 'inline; filename="scan.pdf"'
+    assert s3_storage.local_path(key) is None
+
+
+def test_create_storage_parses_s3_urls(monkeypatch, tmp_path):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    monkeypatch.setenv('S3_ENDPOINT_URL', 'http://localhost:9000')
+    storage = create_storage('s3://bucket/some/prefix/', str(tmp_path))
+    assert (storage.bucket, storage.prefix) == ('bucket', 'some/prefix/')
+    assert storage.client.meta.endpoint_url == 'http://localhost:9000'
+    assert create_storage('s3://bucket', str(tmp_path)).prefix == ''
+    assert create_storage(None, str(tmp_path)).root == str(tmp_path)
+
+
+@pytest.fixture
+def case_for(db):
+    def case_for(doctor_username, patient_username):
+        generalist = DoctorProfile.query.join(User).filter(User.username == doctor_username).one()
+        patient = PatientProfile.query.join(User).filter(User.username == patient_username).one()
+        case = Case(patient_profile_id=patient.id, symptoms='imaging', status='active', doctor_profile_id=generalist.id)
+        db.session.add(case)
+        db.session.commit()
+        return case.id
+    return case_for
+
+
+def upload(client, case_id, data, filename='scan.png'):
+    response = client.post(f'/doctor/case/{case_id}/upload_report', content_type='multipart/form-data',
+                           data={'description': 'scan', 'report_file': (io.BytesIO(data), filename)})
+    assert response.status_code == 302
+
+
+def report_ids(db, case_id):
+    return [r.id for r in db.session.get(Case, case_id).reports]
+
+
+def test_s3_blobs_are_shared_and_released_through_uploads(db, login, case_for, s3_storage, monkeypatch):
+    monkeypatch.setattr(telehealth, 'report_storage', s3_storage)
+    first, second = case_for('doc5', 'patient5'), case_for('doc5', 'patient6')
+    client = login('doc5')
+    data = b'\x89PNG shared scan on s3'
+
+    upload(client, first, data)
+    upload(client, second, data)
+    (report_a,), (report_b,) = report_ids(db, first), report_ids(db, second)
+    sha256 = db.session.get(Report, report_a).blob_sha256
+    assert db.session.get(Report, report_b).blob_sha256 == sha256
+    assert db.session.get(ReportBlob, sha256).ref_count == 2
+    assert s3_storage.exists(sha256)
+
+    assert client.delete(f'/api/reports/{report_a}').status_code == 200
+    db.session.expire_all()
+    assert db.session.get(ReportBlob, sha256).ref_count == 1
+    assert s3_storage.exists(sha256)
+
+    assert client.delete(f'/api/reports/{report_b}').status_code == 200
+    db.session.expire_all()
+    assert db.session.get(ReportBlob, sha256) is None
+    assert not s3_storage.exists(sha256)
+
+
+def test_local_blob_refcount_survives_until_the_last_report_is_deleted(db, login, case_for, tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path / 'blobs'))
+    monkeypatch.setattr(telehealth, 'report_storage', storage)
+    first, second = case_for('doc6', 'patient7'), case_for('doc6', 'patient8')
+    client = login('doc6')
+    data = b'%PDF-1.4 the same discharge summary'
+
+    upload(client, first, data, 'summary.pdf')
+    upload(client, second, data, 'copy.pdf')
+    (report_a,), (report_b,) = report_ids(db, first), report_ids(db, second)
+    sha256 = db.session.get(Report, report_a).blob_sha256
+    assert db.session.get(Report, report_b).blob_sha256 == sha256
+    assert db.session.get(ReportBlob, sha256).ref_count == 2
+    path = storage.local_path(sha256)
+    assert open(path, 'rb').read() == data
+    assert len(list((tmp_path / 'blobs' / sha256[:2]).iterdir())) == 1  # Stored once, no temp files left
+
+    assert client.delete(f'/api/reports/{report_a}').status_code == 200
+    db.session.expire_all()
+    assert db.session.get(ReportBlob, sha256).ref_count == 1
+    assert client.get(f'/reports/{report_b}').status_code == 200
+
+    assert client.delete(f'/api/reports/{report_b}').status_code == 200
+    db.session.expire_all()
+    assert db.session.get(ReportBlob, sha256) is None
+    assert not storage.exists(sha256)
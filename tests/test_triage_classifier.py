@@ -0,0 +1,67 @@
+from triage_classifier import TriageClassifier, TriageRouter, benchmark
+
+
+class StubLLM:
+    """Stands in for the Gemini call: a fixed answer per symptoms string, recording every call."""
+
+    def __init__(self, answers, default='General Physician'):
+        self.answers = answers
+        self.default = default
+        self.calls = []
+
+    def __call__(self, symptoms, vitals):
+        self.calls.append(symptoms)
+        return self.answers.get(symptoms, self.default)
+
+
+def test_confident_local_answer_does_not_call_the_llm():
+    llm = StubLLM({})
+    router = TriageRouter(TriageClassifier(), llm, threshold=0.6)
+
+    label, confidence = router.classifier.predict('sudden chest pain and palpitations')
+    assert label == 'Cardiologist' and confidence >= 0.6
+    assert router.recommend('sudden chest pain and palpitations', 'BP: 150/95') == 'Cardiologist'
+    assert llm.calls == []
+    assert router.stats()['local_answers'] == 1 and router.stats()['escalations'] == 0
+
+
+def test_low_confidence_escalates_to_the_llm():
+    llm = StubLLM({'strange feeling since yesterday': 'Psychiatrist'})
+    router = TriageRouter(TriageClassifier(), llm, threshold=0.6)
+
+    assert router.classifier.predict('strange feeling since yesterday')[1] < 0.6
+    assert router.recommend('strange feeling since yesterday', '') == 'Psychiatrist'
+    assert llm.calls == ['strange feeling since yesterday']
+
+    # A raised threshold sends even a keyword match to the LLM
+    strict = TriageRouter(TriageClassifier(), llm, threshold=1.01)
+    assert strict.recommend('toothache', '') == 'General Physician'
+    assert strict.stats()['escalations'] == 1
+
+
+def test_training_history_shifts_predictions():
+    classifier = TriageClassifier().fit([('persistent heel spur pain', 'Orthopedic')] * 5)
+    assert classifier.predict('heel spur')[0] == 'Orthopedic'
+    assert classifier.trained_on > sum(len(v) for v in classifier.seed.values())
+
+
+def test_benchmark_reports_local_share_and_agreement():
+    samples = [('chest pain', ''), ('toothache', ''), ('skin rash and itching', ''), ('strange feeling', '')]
+    # The LLM agrees on chest pain and the rash, disagrees on the toothache
+    llm = StubLLM({'chest pain': 'Cardiologist', 'toothache': 'ENT Specialist',
+                   'skin rash and itching': 'Dermatologist', 'strange feeling': 'Psychiatrist'})
+    router = TriageRouter(TriageClassifier(), llm=lambda s, v: 'cached', threshold=0.6)
+
+    result = benchmark(router, samples, llm)
+    assert result['samples'] == 4
+    assert result['local_share'] == 0.75
+    assert result['agreement'] == round(2 / 3, 3)
+    # Every sample is timed against the uncached llm; only the unconfident one is escalated again
+    assert llm.calls.count('strange feeling') == 2 and llm.calls.count('chest pain') == 1
+    assert result['llm_p50_ms'] is not None and result['routed_p99_ms'] is not None
+    assert router.stats()['local_answers'] == 0  # benchmark() does not touch the router's counters
+
+
+def test_benchmark_without_samples():
+    result = benchmark(TriageRouter(TriageClassifier(), StubLLM({})), [], StubLLM({}))
+    assert result['samples'] == 0 and result['agreement'] is None and result['llm_p50_ms'] is None
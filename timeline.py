@@ -0,0 +1,98 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+from models import db, TimelineEvent
+
+# Materialized per-patient medical timeline. Each write path that changes a
+# patient's record (case opened, vitals, prescription, report, specialist
+# assigned, case closed) appends a TimelineEvent in the same transaction,
+# carrying everything the entry displays as compact JSON. Reading a history
+# is then one indexed, keyset-paginated query with no joins or lazy loads,
+# however many cases, reports and prescriptions are behind it.
+
+PAGE_SIZE = 50
+SYMPTOMS_CHARS = 200
+
+
+def _append(kind, case, data, at=None, ref_id=None):
+    data = {k: v for k, v in data.items() if v not in (None, '')}
+    db.session.add(TimelineEvent(
+        patient_profile_id=case.patient_profile_id,
+        case_id=case.id,
+        occurred_at=at or datetime.utcnow(),
+        kind=kind,
+        ref_id=ref_id,
+        data=json.dumps(data, separators=(',', ':'))
+    ))
+
+
+def case_opened(case, by=None):
+    """A new case, and the vitals entered with it. `by` is the doctor opening it on the patient's behalf."""
+    symptoms = case.symptoms or ''
+    if len(symptoms) > SYMPTOMS_CHARS:
+        symptoms = symptoms[:SYMPTOMS_CHARS - 3] + '...'
+    _append('case_opened', case, {'symptoms': symptoms, 'specialist': case.required_specialist, 'by': by},
+            at=case.created_at)
+    vitals = {'bp': case.bp, 'hr': case.heart_rate, 'spo2': case.spo2, 'temp': case.temperature}
+    if any(v not in (None, '') for v in vitals.values()):
+        _append('vitals', case, vitals, at=case.created_at)
+
+
+def prescription_added(case, prescription, by):
+    _append('prescription', case, {'medicine': prescription.medicine, 'dosage': prescription.dosage, 'by': by},
+            at=prescription.created_at, ref_id=prescription.id)
+
+
+def report_added(case, report):
+    _append('report', case, {'name': report.file_path, 'type': report.file_type, 'description': report.description},
+            at=report.created_at, ref_id=report.id)
+
+
+def report_deleted(report_id):
+    """Drop a deleted report's entry so the timeline doesn't link to it."""
+    db.session.execute(db.delete(TimelineEvent).where(TimelineEvent.kind == 'report', TimelineEvent.ref_id == report_id))
+
+
+def specialist_assigned(case, specialist, by):
+    _append('specialist_assigned', case, {'specialist': specialist, 'by': by})
+
+
+def case_closed(case, by):
+    _append('case_closed', case, {'by': by})
+
+
+def encode_cursor(event):
+    raw = f"{event.occurred_at.isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for a malformed cursor."""
+    try:
+        occurred_at, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(occurred_at), int(event_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def page(patient_id, cursor=None, limit=PAGE_SIZE):
+    """One page of a patient's timeline, newest first. Returns (events, next_cursor)."""
+    q = db.select(TimelineEvent).where(TimelineEvent.patient_profile_id == patient_id)
+    if cursor:
+        occurred_at, event_id = decode_cursor(cursor)
+        q = q.where(or_(TimelineEvent.occurred_at < occurred_at,
+                        and_(TimelineEvent.occurred_at == occurred_at, TimelineEvent.id < event_id)))
+    rows = db.session.execute(
+        q.order_by(TimelineEvent.occurred_at.desc(), TimelineEvent.id.desc()).limit(limit + 1)
+    ).scalars().all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def event_json(event):
+    entry = {'t': event.occurred_at.isoformat(timespec='seconds'), 'kind': event.kind, 'case': event.case_id}
+    if event.ref_id is not None:
+        entry['ref'] = event.ref_id
+    entry.update(json.loads(event.data))
+    return entry
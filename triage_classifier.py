@@ -0,0 +1,160 @@
+import math
+import re
+import time
+from collections import Counter
+
+from forms import SPECIALIZATIONS
+
+# Seed vocabulary so the model is useful before any history exists.
+# Each phrase is treated as one pseudo-document labelled with its specialization.
+SEED_KEYWORDS = {
+    'General Physician': ['fever', 'cold', 'cough', 'fatigue', 'body ache', 'weakness', 'flu', 'vomiting', 'diarrhea', 'loose motion'],
+    'Cardiologist': ['chest pain', 'palpitations', 'heart', 'irregular heartbeat', 'high blood pressure', 'hypertension', 'breathless on exertion', 'chest tightness'],
+    'Dermatologist': ['rash', 'itching', 'skin', 'acne', 'pimples', 'eczema', 'hair loss', 'psoriasis', 'skin lesion'],
+    'Gynecologist': ['pregnancy', 'pregnant', 'period', 'menstrual', 'irregular periods', 'vaginal discharge', 'pelvic pain', 'menopause'],
+    'Neurologist': ['headache', 'migraine', 'seizure', 'numbness', 'tingling', 'dizziness', 'memory loss', 'tremor', 'paralysis', 'fainting'],
+    'Pediatrician': ['child', 'baby', 'infant', 'toddler', 'newborn', 'vaccination', 'kid'],
+    'Orthopedic': ['fracture', 'joint pain', 'back pain', 'knee pain', 'sprain', 'bone', 'shoulder pain', 'swollen joint', 'neck pain'],
+    'Psychiatrist': ['anxiety', 'depression', 'insomnia', 'panic attack', 'stress', 'mood swings', 'hallucination', 'suicidal'],
+    'Ophthalmologist': ['eye', 'blurred vision', 'vision', 'red eye', 'eye pain', 'watery eyes', 'cataract'],
+    'ENT Specialist': ['ear', 'ear pain', 'throat', 'sore throat', 'sinus', 'nose bleed', 'tonsils', 'hearing loss', 'blocked nose'],
+    'Dentist': ['tooth', 'toothache', 'gum', 'bleeding gums', 'cavity', 'dental', 'jaw pain'],
+    'Nutritionist': ['diet', 'weight loss', 'weight gain', 'obesity', 'malnutrition', 'appetite', 'underweight'],
+}
+
+STOPWORDS = {'a', 'an', 'the', 'and', 'or', 'of', 'in', 'on', 'for', 'with', 'since', 'from', 'to',
+             'is', 'are', 'was', 'has', 'have', 'had', 'my', 'i', 'me', 'patient', 'days', 'day',
+             'weeks', 'week', 'severe', 'mild', 'some', 'very', 'also', 'no', 'not'}
+
+
+def stem(word):
+    # Crude suffix stripping so "itching"/"itchy"/"itches" share a token
+    for suffix in ('ing', 'ies', 'es', 'y', 's'):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix) and not word.endswith('ss'):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    words = [stem(w) for w in re.findall(r'[a-z]+', (text or '').lower()) if w not in STOPWORDS]
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+class TriageClassifier:
+    """Multinomial naive Bayes over symptom keywords -> specialization.
+
+    Trained from the seed vocabulary plus historical (symptoms, required_specialist)
+    pairs. predict() is pure Python dictionary lookups, so it answers in
+    microseconds; callers escalate to the LLM when confidence is low.
+    """
+
+    def __init__(self, labels=None, seed=SEED_KEYWORDS, alpha=0.05):
+        self.labels = labels or [value for value, _ in SPECIALIZATIONS]
+        self.seed = seed
+        self.alpha = alpha
+        self.fit([])
+
+    def fit(self, pairs):
+        """pairs: iterable of (symptoms, specialization). Unknown labels are ignored."""
+        doc_counts = Counter()
+        token_counts = {label: Counter() for label in self.labels}
+        for label, phrases in self.seed.items():
+            if label in token_counts:
+                for phrase in phrases:
+                    doc_counts[label] += 1
+                    token_counts[label].update(tokenize(phrase))
+        for symptoms, label in pairs:
+            if label in token_counts and symptoms:
+                doc_counts[label] += 1
+                token_counts[label].update(tokenize(symptoms))
+
+        vocab = set().union(*token_counts.values())
+        total_docs = sum(doc_counts.values()) or 1
+        self.vocab = vocab
+        self.log_prior = {}
+        self.log_likelihood = {}
+        self.log_unseen = {}
+        for label in self.labels:
+            denom = sum(token_counts[label].values()) + self.alpha * (len(vocab) + 1)
+            self.log_prior[label] = math.log((doc_counts[label] + self.alpha) / (total_docs + self.alpha * len(self.labels)))
+            self.log_likelihood[label] = {t: math.log((n + self.alpha) / denom) for t, n in token_counts[label].items()}
+            self.log_unseen[label] = math.log(self.alpha / denom)
+        self.trained_on = total_docs
+        return self
+
+    def predict(self, symptoms):
+        """Return (specialization, confidence in [0, 1]). Confidence is 0 if no known keyword matched."""
+        tokens = [t for t in tokenize(symptoms) if t in self.vocab]
+        if not tokens:
+            return self.labels[0], 0.0
+        scores = {}
+        for label in self.labels:
+            ll, unseen = self.log_likelihood[label], self.log_unseen[label]
+            scores[label] = self.log_prior[label] + sum(ll.get(t, unseen) for t in tokens)
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        confidence = 1.0 / sum(math.exp(s - top) for s in scores.values())
+        return best, confidence
+
+
+class TriageRouter:
+    """Answer from the local classifier when confident, otherwise escalate to `llm(symptoms, vitals)`."""
+
+    def __init__(self, classifier, llm, threshold=0.6):
+        self.classifier = classifier
+        self.llm = llm
+        self.threshold = threshold
+        self.local_answers = 0
+        self.escalations = 0
+
+    def recommend(self, symptoms, vitals):
+        label, confidence = self.classifier.predict(symptoms)
+        if confidence >= self.threshold:
+            self.local_answers += 1
+            return label
+        self.escalations += 1
+        return self.llm(symptoms, vitals)
+
+    def stats(self):
+        return {'local_answers': self.local_answers, 'escalations': self.escalations,
+                'threshold': self.threshold, 'trained_on': self.classifier.trained_on}
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def benchmark(router, samples, llm):
+    """Compare the routed (local-first) path against the LLM-only path.
+
+    samples: list of (symptoms, vitals). `llm` must be the uncached model call
+    (or a stub); the router's own llm is usually cached, so timing it would
+    measure cache hits. Returns p50/p99 latency in ms for both paths, the share
+    answered locally and the local/LLM agreement rate on the samples the
+    classifier answered by itself.
+    """
+    routed_ms, llm_ms = [], []
+    local, agree = 0, 0
+    for symptoms, vitals in samples:
+        started = time.perf_counter()
+        expected = llm(symptoms, vitals)
+        llm_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        label, confidence = router.classifier.predict(symptoms)
+        answer = label if confidence >= router.threshold else llm(symptoms, vitals)
+        routed_ms.append((time.perf_counter() - started) * 1000)
+
+        if confidence >= router.threshold:
+            local += 1
+            agree += answer == expected
+    return {
+        'samples': len(samples),
+        'llm_p50_ms': round(_percentile(llm_ms, 50), 3) if samples else None,
+        'llm_p99_ms': round(_percentile(llm_ms, 99), 3) if samples else None,
+        'routed_p50_ms': round(_percentile(routed_ms, 50), 3) if samples else None,
+        'routed_p99_ms': round(_percentile(routed_ms, 99), 3) if samples else None,
+        'local_share': round(local / len(samples), 3) if samples else 0.0,
+        'agreement': round(agree / local, 3) if local else None,
+    }
@@ -0,0 +1,49 @@
+from sqlalchemy.orm import joinedload
+from models import db, Case
+
+# Triage queues of open cases, one per specialization.
+# 1. General Physicians see cases with NULL specialist req or 'General Physician'.
+# 2. Specialists see cases tagged specifically for their specialization.
+# Doctors' sockets join their queue's room, so new and claimed cases are pushed
+# to every dashboard showing that queue. Claiming is one conditional UPDATE,
+# so exactly one of several doctors accepting the same case wins.
+
+GENERAL = 'General Physician'
+
+
+def queue_name(required_specialist):
+    """Queue a case with this required_specialist belongs to."""
+    return required_specialist or GENERAL
+
+
+def queue_room(specialization):
+    return f'triage_{specialization}'
+
+
+def in_queue(specialization):
+    """SQL condition: the case belongs to this specialization's queue."""
+    if specialization == GENERAL:
+        return (Case.required_specialist == None) | (Case.required_specialist == GENERAL)
+    return Case.required_specialist == specialization
+
+
+def open_cases(specialization, limit=20):
+    """Oldest-first open cases of one queue."""
+    return Case.query.options(joinedload(Case.patient_profile)).filter(
+        Case.status == 'open', in_queue(specialization)
+    ).order_by(Case.created_at.asc()).limit(limit).all()
+
+
+def claim(case_id, doc_profile):
+    """Atomically take an open case from the doctor's queue. Returns True if this doctor got it.
+
+    The status check is part of the UPDATE itself, so concurrent claims are
+    serialised by the database row lock and only the first one matches.
+    Caller commits, together with whatever else records the claim.
+    """
+    return db.session.execute(
+        db.update(Case)
+          .where(Case.id == case_id, Case.status == 'open', in_queue(doc_profile.specialization))
+          .values(status='active', doctor_profile_id=doc_profile.id)
+          .execution_options(synchronize_session=False)
+    ).rowcount == 1
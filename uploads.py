@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+# Resumable chunked uploads for large reports (X-ray/CT images).
+# Each upload is a directory under `root`:
+#   meta.json      what init() was told (case, filename, size, chunk size, ...)
+#   data.part      the file being assembled, chunks written at their offsets
+#   received/<n>   one marker per verified chunk, holding its SHA-256
+# Chunks are streamed to disk in small blocks, so memory per upload is
+# constant, and a client that loses its connection asks status() which chunks
+# are missing and sends only those.
+
+COPY_BLOCK = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+class ChunkedUploadStore:
+    def __init__(self, root, chunk_size=1024 * 1024, max_size=512 * 1024 * 1024, max_age=24 * 3600):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.max_age = max_age  # Unfinished uploads older than this are removed by purge_stale()
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, upload_id):
+        # upload ids are uuid hex; reject anything else before touching the filesystem
+        if not upload_id or len(upload_id) != 32 or not all(c in '0123456789abcdef' for c in upload_id):
+            raise UploadError('Unknown upload')
+        path = os.path.join(self.root, upload_id)
+        if not os.path.isdir(path):
+            raise UploadError('Unknown upload')
+        return path
+
+    def init(self, filename, size, **meta):
+        """Start an upload and return its id. Extra keyword args are kept in meta.json."""
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError('Invalid size')
+        if size > self.max_size:
+            raise UploadError(f'File too large (limit {self.max_size // (1024 * 1024)}MB)')
+        upload_id = uuid.uuid4().hex
+        path = os.path.join(self.root, upload_id)
+        os.makedirs(os.path.join(path, 'received'))
+        with open(os.path.join(path, 'data.part'), 'wb') as f:
+            f.truncate(size)
+        meta.update(filename=filename, size=size, chunk_size=self.chunk_size,
+                    total_chunks=-(-size // self.chunk_size), created=time.time())
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        return upload_id
+
+    def meta(self, upload_id):
+        with open(os.path.join(self._dir(upload_id), 'meta.json')) as f:
+            return json.load(f)
+
+    def received(self, upload_id):
+        return sorted(int(n) for n in os.listdir(os.path.join(self._dir(upload_id), 'received')))
+
+    def status(self, upload_id):
+        meta = self.meta(upload_id)
+        return {'upload_id': upload_id, 'size': meta['size'], 'chunk_size': meta['chunk_size'],
+                'total_chunks': meta['total_chunks'], 'received': self.received(upload_id)}
+
+    def put_chunk(self, upload_id, index, stream, sha256=None):
+        """Stream chunk `index` from a file-like `stream` into place.
+
+        The chunk must be exactly chunk_size bytes (the last one may be shorter).
+        If `sha256` is given, the chunk is only marked received when it matches;
+        a bad chunk is simply re-sent, overwriting the same byte range.
+        """
+        path = self._dir(upload_id)
+        meta = self.meta(upload_id)
+        if not 0 <= index < meta['total_chunks']:
+            raise UploadError('Chunk index out of range')
+        offset = index * meta['chunk_size']
+        expected = min(meta['chunk_size'], meta['size'] - offset)
+
+        # A re-sent chunk is not received until its new bytes verify
+        marker = os.path.join(path, 'received', str(index))
+        if os.path.exists(marker):
+            os.remove(marker)
+
+        digest = hashlib.sha256()
+        written = 0
+        with open(os.path.join(path, 'data.part'), 'r+b') as f:
+            f.seek(offset)
+            while True:
+                block = stream.read(min(COPY_BLOCK, expected + 1 - written))
+                if not block:
+                    break
+                written += len(block)
+                if written > expected:
+                    raise UploadError('Chunk larger than expected')
+                digest.update(block)
+                f.write(block)
+        if written != expected:
+            raise UploadError(f'Chunk size mismatch: expected {expected} bytes, got {written}')
+        if sha256 and digest.hexdigest() != sha256.lower():
+            raise UploadError('Checksum mismatch')
+
+        with open(marker, 'w') as f:
+            f.write(digest.hexdigest())
+        return digest.hexdigest()
+
+    def finalize(self, upload_id, dest_path):
+        """Move the completed file to dest_path. Returns the upload's meta."""
+        path = self._dir(upload_id)
+        meta = self.meta(upload_id)
+        missing = set(range(meta['total_chunks'])) - set(self.received(upload_id))
+        if missing:
+            raise UploadError(f'{len(missing)} chunk(s) missing')
+        shutil.move(os.path.join(path, 'data.part'), dest_path)
+        shutil.rmtree(path, ignore_errors=True)
+        return meta
+
+    def abort(self, upload_id):
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def purge_stale(self):
+        """Remove uploads that were never finalized."""
+        cutoff = time.time() - self.max_age
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            part = os.path.join(path, 'data.part')
+            last_write = os.path.getmtime(part) if os.path.exists(part) else os.path.getmtime(path)
+            if last_write < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
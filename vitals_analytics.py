@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from models import db, VitalReading
+
+# Vitals analytics over the VitalReading time series. Readings are pulled in
+# one query into a DataFrame and every statistic is computed for all
+# (patient, kind) series at once with grouped, vectorized operations, never
+# with a Python loop per patient or per reading:
+# - rolling_trends: least-squares slope per year, rolling mean and change
+# - PopulationSnapshot: latest reading of every patient, sorted per kind, for
+#   population percentiles and a patient's percentile rank
+# - downsample: fixed number of time buckets per series for charts
+
+COLUMNS = ['patient_profile_id', 'kind', 'recorded_at', 'value']
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+
+
+def load_frame(patient_ids=None, kinds=None, since=None):
+    """Readings as a DataFrame sorted by patient, kind and time."""
+    query = db.select(VitalReading.patient_profile_id, VitalReading.kind,
+                      VitalReading.recorded_at, VitalReading.value)
+    if patient_ids is not None:
+        query = query.where(VitalReading.patient_profile_id.in_(list(patient_ids)))
+    if kinds:
+        query = query.where(VitalReading.kind.in_(list(kinds)))
+    if since is not None:
+        query = query.where(VitalReading.recorded_at >= since)
+    query = query.order_by(VitalReading.patient_profile_id, VitalReading.kind, VitalReading.recorded_at)
+    frame = pd.DataFrame(db.session.execute(query).all(), columns=COLUMNS)
+    frame['recorded_at'] = pd.to_datetime(frame['recorded_at'])
+    frame['value'] = frame['value'].astype(float)
+    return frame
+
+
+def rolling_trends(frame, window='365D'):
+    """One row per (patient, kind): count, first/last reading, change, rolling
+    mean over `window` ending at the last reading and the least-squares slope
+    in units per year (NaN with fewer than two distinct timestamps)."""
+    if frame.empty:
+        return pd.DataFrame(columns=['patient_profile_id', 'kind', 'count', 'first_at', 'last_at',
+                                     'first', 'last', 'change', 'rolling_mean', 'slope_per_year'])
+    frame = frame.sort_values(['patient_profile_id', 'kind', 'recorded_at'])
+    keys = ['patient_profile_id', 'kind']
+    groups = frame.groupby(keys, sort=False)
+
+    # Closed-form regression from per-group sums; x is years since the series'
+    # first reading so the sums stay small enough to be numerically safe
+    x = (frame['recorded_at'] - groups['recorded_at'].transform('min')).dt.total_seconds() / SECONDS_PER_YEAR
+    y = frame['value']
+    sums = pd.DataFrame({'x': x, 'y': y, 'xx': x * x, 'xy': x * y}).groupby(
+        [frame['patient_profile_id'], frame['kind']], sort=False).sum()
+    n = groups.size()
+    denom = n * sums['xx'] - sums['x'] ** 2
+    slope = (n * sums['xy'] - sums['x'] * sums['y']) / denom.where(denom > 1e-12)
+
+    rolling = (frame.set_index('recorded_at').groupby(keys, sort=False)['value']
+               .rolling(window).mean().groupby(level=[0, 1], sort=False).last())
+
+    trends = groups.agg(count=('value', 'size'), first_at=('recorded_at', 'first'), last_at=('recorded_at', 'last'),
+                        first=('value', 'first'), last=('value', 'last'))
+    trends['change'] = trends['last'] - trends['first']
+    trends['rolling_mean'] = rolling
+    trends['slope_per_year'] = slope
+    return trends.reset_index()
+
+
+def downsample(frame, max_points=200):
+    """Reduce each kind's series to at most `max_points` equal-width time
+    buckets, keeping the mean, min and max of each bucket (so spikes still show
+    on the chart). Series already short enough are returned unchanged."""
+    if frame.empty:
+        return frame.assign(min=frame['value'], max=frame['value'])
+    frame = frame.sort_values(['kind', 'recorded_at'])
+    t = frame['recorded_at'].dt.as_unit('ns').astype('int64')  # Nanoseconds whatever the frame's resolution
+    t_min = t.groupby(frame['kind']).transform('min').to_numpy()
+    t_max = t.groupby(frame['kind']).transform('max').to_numpy()
+    t = t.to_numpy()
+    span = np.maximum(t_max - t_min, 1)
+    bucket = np.minimum(((t - t_min) / span * max_points).astype(np.int64), max_points - 1)
+
+    sizes = frame.groupby('kind')['value'].transform('size').to_numpy()
+    bucket = np.where(sizes > max_points, bucket, np.arange(len(frame)))  # Short series: one bucket per reading
+
+    binned = frame.assign(bucket=bucket, t=t).groupby(['kind', 'bucket'], sort=True).agg(
+        t=('t', 'mean'), value=('value', 'mean'), min=('value', 'min'), max=('value', 'max'))
+    binned['recorded_at'] = pd.to_datetime(binned['t'].round().astype('int64'), unit='ns').dt.round('s')
+    return binned.reset_index()[['kind', 'recorded_at', 'value', 'min', 'max']]
+
+
+def series_payload(frame):
+    """Downsampled frame -> {kind: [{t, value, min, max}]} for JSON."""
+    payload = {}
+    for kind, rows in frame.groupby('kind', sort=False):
+        payload[kind] = [
+            {'t': t.isoformat(), 'value': round(v, 2), 'min': round(lo, 2), 'max': round(hi, 2)}
+            for t, v, lo, hi in zip(rows['recorded_at'], rows['value'].astype(float),
+                                    rows['min'].astype(float), rows['max'].astype(float))
+        ]
+    return payload
+
+
+class PopulationSnapshot:
+    """Latest reading of every patient, as one sorted array per kind."""
+
+    def __init__(self, latest):
+        self.values = {kind: np.sort(group.to_numpy(dtype=float))
+                       for kind, group in latest.groupby('kind')['value']}
+
+    @classmethod
+    def load(cls):
+        # Latest reading per (patient, kind) in SQL, served by the (patient, kind, time) index
+        latest_at = db.select(VitalReading.patient_profile_id, VitalReading.kind,
+                              db.func.max(VitalReading.recorded_at).label('recorded_at')) \
+            .group_by(VitalReading.patient_profile_id, VitalReading.kind).subquery()
+        rows = db.session.execute(
+            db.select(VitalReading.patient_profile_id, VitalReading.kind, VitalReading.recorded_at,
+                      VitalReading.value)
+              .join(latest_at, (VitalReading.patient_profile_id == latest_at.c.patient_profile_id)
+                    & (VitalReading.kind == latest_at.c.kind)
+                    & (VitalReading.recorded_at == latest_at.c.recorded_at))
+        ).all()
+        latest = pd.DataFrame(rows, columns=COLUMNS)
+        # Several readings at the same latest timestamp: keep one per patient
+        latest = latest.drop_duplicates(['patient_profile_id', 'kind'], keep='last')
+        return cls(latest)
+
+    def percentiles(self, qs=(5, 25, 50, 75, 95)):
+        """{kind: {'patients': n, 'p5': ..., ...}} across the population."""
+        result = {}
+        for kind, values in self.values.items():
+            stats = dict(zip((f'p{q}' for q in qs), np.percentile(values, qs).round(2).tolist()))
+            result[kind] = {'patients': int(values.size), **stats}
+        return result
+
+    def rank(self, kinds, values):
+        """Percentile rank (0-100) of each value within its kind's population, or None."""
+        ranks = []
+        for kind, value in zip(kinds, values):
+            population = self.values.get(kind)
+            if population is None or not population.size or value is None or np.isnan(value):
+                ranks.append(None)
+                continue
+            below = np.searchsorted(population, value, side='left')
+            at_or_below = np.searchsorted(population, value, side='right')
+            ranks.append(round(float((below + at_or_below) / 2 / population.size * 100), 1))
+        return ranks